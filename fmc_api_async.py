@@ -0,0 +1,371 @@
+# Import Required Modules
+import time
+import httpx
+import asyncio
+import traceback
+from collections import deque
+
+# Import custom modules from file
+from fmc_api_module import \
+        select,\
+        page_url,\
+        RuleParser,\
+        RuleExport,\
+        retry_delay,\
+        get_device_record,\
+        iter_inventory,\
+        save_inventory,\
+        update_rule_policies,\
+        BulkPlan,\
+        PageError,\
+        PAGE_RETRIES,\
+        MAX_PARALLEL
+
+
+#
+#
+#
+# Async FMC Client, shares Access Token and Rate Limiter with FmcClient
+#   Concurrency is bounded by semaphore, all requests run on a single thread
+class AsyncFmcClient:
+    def __init__(self,client,concurrency=MAX_PARALLEL):
+        self.client = client
+        self.server = client.server
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.http = httpx.AsyncClient(
+            verify=client.verify,
+            headers=client.headers,
+            timeout=httpx.Timeout(client.timeout[1],connect=client.timeout[0]),
+            limits=httpx.Limits(max_connections=concurrency,max_keepalive_connections=concurrency)
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self,*exc):
+        await self.aclose()
+
+    # Return shared Access Token, generated or refreshed in worker thread
+    async def token(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None,self.client.tokens.token)
+
+    # Wait for shared Rate Limiter without blocking event loop
+    async def acquire(self):
+        waited = 0.0
+        delay = self.client.limiter.try_acquire()
+        while delay:
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = self.client.limiter.try_acquire(waited)
+
+    # Perform authenticated REST call
+    #   429 responses are retried after Retry-After or backoff delay
+    #   401 responses are retried once with a new Access Token
+    async def request(self,method,url,**kwargs):
+        headers = dict(kwargs.pop('headers',None) or {})
+        async with self.semaphore:
+            for auth_attempt in range(2):
+                token = await self.token()
+                headers['X-auth-access-token'] = token
+                attempt = 0
+                while True:
+                    await self.acquire()
+                    r = await self.http.request(method,url,headers=headers,**kwargs)
+                    if r.status_code != 429 or attempt >= self.client.max_retries:
+                        break
+                    attempt += 1
+                    delay = retry_delay(r,attempt)
+                    print(f'Rate limit exceeded (429), retrying in {delay:.1f}s... {url}')
+                    self.client.limiter.throttle(delay)
+                if r.status_code != 401:
+                    break
+                print('Access token invalid... Attempting to Renew Token...')
+                self.client.tokens.invalidate(token)
+        return r
+
+    async def get(self,url,**kwargs):
+        return await self.request('GET',url,**kwargs)
+
+    async def post(self,url,**kwargs):
+        return await self.request('POST',url,**kwargs)
+
+    async def put(self,url,**kwargs):
+        return await self.request('PUT',url,**kwargs)
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+#
+#
+#
+# Collects and returns JSON response of a single page
+#   Connection errors, timeouts, invalid JSON and 5xx are retried with backoff, other status codes are not
+#   Raises PageError when page still fails after retries
+#   raw == return response bytes of successful page without decoding, for decoding in another process
+async def get_page(url,aclient,retries=PAGE_RETRIES,raw=False):
+    print(f'*\n*\nCOLLECTING PAGE... {url}')
+    for attempt in range(retries+1):
+        status_code = None
+        try:
+            r = await aclient.get(url)
+            status_code = r.status_code
+            if raw and (status_code == 200):
+                return r.content
+            json_resp = r.json()
+            if status_code == 200:
+                return json_resp
+            print(f'Status code:--> {status_code}')
+            print(f'Error occurred in GET --> {json_resp}')
+        except (httpx.HTTPError,ValueError) as err:
+            print(f'Error in connection --> {err}')
+        if (status_code is not None) and (status_code < 500):
+            break
+        if attempt < retries:
+            delay = 2**attempt
+            print(f'Retrying page in {delay}s... {url}')
+            await asyncio.sleep(delay)
+    raise PageError(f'Failed to collect page, status code: {status_code} --> {url}')
+
+#
+#
+#
+# Collects and returns items from all pages
+#   Remaining pages are built from paging count of first page, and collected concurrently
+async def get_items(url,aclient):
+    json_resp = await get_page(url,aclient)
+    temp_list = json_resp.get('items',[])
+    paging = json_resp.get('paging',{})
+    if 'next' in paging:
+        urls = [page_url(url,i,paging['limit']) for i in range(paging['offset']+paging['limit'],paging['count'],paging['limit'])]
+        for page in await asyncio.gather(*[get_page(u,aclient) for u in urls]):
+            temp_list.extend(page.get('items',[]))
+    return temp_list
+
+#
+#
+#
+# PUT single bulk chunk, return (status_code, error, seconds)
+async def put_chunk(aclient,url,chunk):
+    start = time.time()
+    try:
+        r = await aclient.put(url,json=chunk)
+        if r.status_code == 200:
+            return r.status_code,None,time.time()-start
+        return r.status_code,r.text,time.time()-start
+    except httpx.HTTPError as err:
+        return None,traceback.format_exc(),time.time()-start
+
+#
+#
+#
+# PUT items in chunks concurrently, return list of per-chunk results
+#   Chunk size, retries and splitting of failed chunks follow BulkPlan, as threaded put_bulk_chunks
+async def bulk_put(aclient,url,items,concurrency=MAX_PARALLEL,retries=2):
+    plan = BulkPlan(len(items),retries)
+    pending = {}
+    while pending or plan.remaining():
+        while (len(pending) < concurrency) and plan.remaining():
+            first,last,attempts = plan.next_chunk()
+            pending[asyncio.ensure_future(put_chunk(aclient,url,items[first:last]))] = (first,last,attempts)
+        done,_ = await asyncio.wait(pending,return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            plan.done(*pending.pop(task),*task.result())
+    return plan.results
+
+
+#
+#
+#
+# Select domain from shared Access Token
+def select_domain(client):
+    domains = client.domains()
+    if len(domains) > 1:
+        return select('Domain',domains)['uuid']
+    return domains[0]['uuid']
+
+#
+#
+#
+# Export ACP and Prefilter Rules, collecting policies concurrently
+#   Pages are parsed in RuleParser processes, and written in policy order by RuleExport in a worker thread
+#   At most MAX_PARALLEL*2 policies are collected ahead of writer, and MAX_PARALLEL*2 more are queued to it
+async def export_acp_rules(client):
+    FMC_NAME = client.server.replace('https://','')
+    API_UUID = select_domain(client)
+
+    async with AsyncFmcClient(client) as aclient:
+        # Get all Access Control Policies
+        print('*\n*\nCOLLECTING Access Policies...')
+        url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies?expanded=true&offset=0&limit=1000'
+        acp_list = await get_items(url,aclient)
+        # Get Prefilter Policy timestamps, for incremental export
+        url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/prefilterpolicies?expanded=true&offset=0&limit=1000'
+        prefilter_stamps = {item['id']:item.get('metadata',{}).get('timestamp') for item in await get_items(url,aclient)}
+
+    export = RuleExport(FMC_NAME,API_UUID,acp_list,prefilter_stamps)
+    export.ask()
+
+    loop = asyncio.get_running_loop()
+    results = asyncio.Queue(maxsize=MAX_PARALLEL*2)
+
+    # Writer thread takes policy results from queue of event loop, None ends writing
+    def next_result():
+        return asyncio.run_coroutine_threadsafe(results.get(),loop).result()
+
+    with RuleParser(FMC_NAME,export.processes) as parser:
+        writer = loop.run_in_executor(None,export.write,iter(next_result,None))
+
+        async with AsyncFmcClient(client) as aclient:
+            # Collect all pages of a collection as raw responses, and return futures of parsed pages in page order
+            #   Remaining pages are built from paging count of first page returned by its parser, and parsed as they arrive
+            async def parsed_pages(url):
+                pages = [parser.submit(await get_page(url,aclient,raw=True))]
+                paging = (await asyncio.wrap_future(pages[0]))[0]
+                if 'next' in paging:
+                    async def parsed_page(u):
+                        return parser.submit(await get_page(u,aclient,raw=True))
+                    urls = [page_url(url,i,paging['limit']) for i in range(paging['offset']+paging['limit'],paging['count'],paging['limit'])]
+                    pages += await asyncio.gather(*[parsed_page(u) for u in urls])
+                return pages
+
+            # Collect rules of each Prefilter Policy once per run
+            #   Returns None for Prefilter Policy unchanged since last export
+            async def prefilter_rules(prefilter_id):
+                if export.skip_prefilter(prefilter_id):
+                    return None
+                print(f'*\n*\nCOLLECTING Prefilter Policy rules... {prefilter_id}')
+                url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/prefilterpolicies/{prefilter_id}/prefilterrules?expanded=true&offset=0&limit=1000'
+                return await parsed_pages(url)
+            prefilter_tasks = {}
+
+            # Collect rules of each policy and its Prefilter Policy, return futures of parsed pages
+            #   Rules of policy unchanged since last export are not collected
+            async def policy_rules(acp):
+                pages = None
+                if not export.skip_policy(acp):
+                    pages = await parsed_pages(f'{acp["rules"]["links"]["self"]}?expanded=true&offset=0&limit=1000')
+                # GET PREFILTER RULES ALSO
+                prefilter_id = acp['prefilterPolicySetting']['id']
+                if prefilter_id not in prefilter_tasks:
+                    prefilter_tasks[prefilter_id] = asyncio.ensure_future(prefilter_rules(prefilter_id))
+                return pages,prefilter_id,await prefilter_tasks[prefilter_id]
+
+            # Collect policies concurrently, and queue results in policy order
+            async def collect():
+                tasks = deque()
+                try:
+                    for acp in acp_list:
+                        tasks.append(asyncio.ensure_future(policy_rules(acp)))
+                        if len(tasks) >= MAX_PARALLEL*2:
+                            await results.put(await tasks.popleft())
+                    while tasks:
+                        await results.put(await tasks.popleft())
+                finally:
+                    for task in tasks:
+                        task.cancel()
+
+            print(f'*\n*\nCOLLECTING RULES OF {len(acp_list)} POLICIES WITH {MAX_PARALLEL} WORKERS, PARSING WITH {export.processes} PROCESSES...')
+            collector = asyncio.ensure_future(collect())
+            # Writer only finishes before collector when it fails, collecting stops then
+            done,_ = await asyncio.wait([collector,writer],return_when=asyncio.FIRST_COMPLETED)
+            if writer in done:
+                collector.cancel()
+                writer.result()
+            try:
+                collector.result()
+            finally:
+                await results.put(None)
+        await writer
+
+    export.close()
+
+#
+#
+#
+# Get Inventory, collecting devices, clusters and HA pairs concurrently
+async def get_inventory(client):
+    API_UUID = select_domain(client)
+
+    async with AsyncFmcClient(client) as aclient:
+        print('*\n*\nCOLLECTING ALL INVENTORY...')
+        DEVICELIST_DATA,CLUSTER_DATA,HA_DATA = await asyncio.gather(
+            get_items(f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/devices/devicerecords?expanded=true&offset=0&limit=1000',aclient),
+            get_items(f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/deviceclusters/ftddevicecluster?expanded=true&offset=0&limit=1000',aclient),
+            get_items(f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/devicehapairs/ftddevicehapairs?expanded=true&offset=0&limit=1000',aclient)
+        )
+
+    DEVICELIST_DATA = [get_device_record(item) for item in DEVICELIST_DATA]
+    print('*\n*\nFMC Inventory collection successful...')
+    save_inventory(iter_inventory(DEVICELIST_DATA,CLUSTER_DATA,HA_DATA),client.server.replace('https://',''))
+
+#
+#
+#
+# Update IPS and/or File Policy for Access Rules, sending bulk PUT chunks concurrently
+async def put_intrusion_file(client):
+    API_UUID = select_domain(client)
+
+    all_rules = False
+    Test = False
+    while not Test:
+        choice = input('Would You Like To Apply IPS and File Policy to ALL rules ? [y/N]: ').lower()
+        if choice in (['yes','ye','y']):
+            all_rules = True
+            Test = True
+        elif choice in (['no','n','']):
+            Test = True
+        else:
+            print('Invalid Selection...\n')
+
+    async with AsyncFmcClient(client) as aclient:
+        # Get all policies and Variable Sets concurrently
+        print('*\n*\nCOLLECTING Access Policies, Intusion Policies, Variable Sets and File Policies...')
+        acp_list,ips_list,vset_list,file_list = await asyncio.gather(
+            get_items(f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies?expanded=true&offset=0&limit=1000',aclient),
+            get_items(f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/intrusionpolicies?offset=0&limit=1000',aclient),
+            get_items(f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/variablesets?offset=0&limit=1000',aclient),
+            get_items(f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/filepolicies?offset=0&limit=1000',aclient)
+        )
+
+    # Select policies with client closed, input does not block open requests of event loop
+    acp = select('Access Control Policy',acp_list)
+    # Add None option
+    ips_list.append({'None':'None'})
+    ips = select('Intusion Policy',ips_list)
+    vset = select('Variable Set',vset_list) if ips else None
+    # Add None option
+    file_list.append({'None':'None'})
+    filepolicy = select('File Policy',file_list)
+
+    # Exit if no IPS or File Policy Selected
+    if (not ips) and (not filepolicy):
+        print(f'*\n*\nNo IPS or File policy selected, Exiting...\n')
+        return
+
+    async with AsyncFmcClient(client) as aclient:
+        # Get all Access Control Policy rules
+        print('*\n*\nCOLLECTING Access Policy rules...')
+        url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies/{acp["id"]}/accessrules?offset=0&limit=1000&expanded=true'
+        acp_rules = await get_items(url,aclient)
+
+        # Operate only on ALLOW rules
+        acp_rules = [i for i in acp_rules if i['action'] == 'ALLOW']
+
+        # Operate only on rules that have IPS/File policy
+        if not all_rules:
+            acp_rules = [i for i in acp_rules if ('ipsPolicy' in i) or ('filePolicy' in i)]
+
+        # Apply selected IPS/File policy to all rules
+        update_rule_policies(acp_rules,ips,vset,filepolicy,all_rules)
+
+        url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies/{acp["id"]}/accessrules?bulk=true'
+        results = await bulk_put(aclient,url,acp_rules)
+
+    updated = sum(result['count'] for result in results if not result['error'])
+    failed = [result for result in results if result['error'] and not result['retried']]
+    print(f'*\n*\nAccess Rules updated: {updated} of {len(acp_rules)} in {len(results)} chunks')
+    for result in failed:
+        print(f'Rules {result["first"]}-{result["first"]+result["count"]-1} failed, status code:--> {result["status"]}')
+        print(f'Error occurred in PUT --> {result["error"]}')
@@ -0,0 +1,609 @@
+# Import Required Modules
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import tracemalloc
+
+# Import custom modules from file
+from fmc_api_module import \
+        group_levels,\
+        build_network_group,\
+        index_network_objects,\
+        diff_network_group,\
+        iter_inventory,\
+        parse_rule,\
+        RuleParser,\
+        RULE_WRITERS,\
+        BULK_LIMIT
+from fmc_asa_parser import \
+        iter_asa_records,\
+        load_network_objects
+
+
+#
+#
+#
+# Generate synthetic ASA config with roughly the requested number of lines
+#   Half the lines define objects, half define groups of 20 entries nesting earlier groups
+def synthetic_asa_config(lines,seed=1):
+    rand = random.Random(seed)
+    objCount = lines//4
+    groupCount = lines//42
+    config = []
+    for i in range(objCount):
+        config.append(f'object network OBJ-{i}')
+        if i % 3 == 0:
+            config.append(f' host 10.{i//65536%256}.{i//256%256}.{i%256}')
+        elif i % 3 == 1:
+            config.append(f' subnet 10.{i//65536%256}.{i//256%256}.0 255.255.255.0')
+        else:
+            config.append(f' fqdn host{i}.example.com')
+    for i in range(groupCount):
+        config.append(f'object-group network GRP-{i}')
+        for k in range(20):
+            if (k == 0) and (i > 0):
+                config.append(f' group-object GRP-{rand.randrange(i)}')
+            elif k % 4 == 1:
+                config.append(f' network-object host 192.168.{k}.{i%256}')
+            else:
+                config.append(f' network-object object OBJ-{rand.randrange(objCount)}')
+    return '\n'.join(config)
+
+#
+#
+#
+# Benchmark ASA group parse and resolve phase of post_network_object_group
+def bench_group_resolution(sizes=(25000,50000,100000)):
+    print('LINES,OBJECTS,GROUPS,SECONDS,US_PER_LINE')
+    for lines in sizes:
+        text = synthetic_asa_config(lines)
+        lines = text.count('\n')+1
+        start = time.perf_counter()
+        Data,groupEntries = load_network_objects(text.splitlines())
+        # Simulate created objects and groups
+        objIndex = {i['name']:{'type':i['type'],'id':f'id-{i["name"]}'} for v in Data['objects'].values() for i in v}
+        groupDeps = {name:[item.split()[-1] for item in entries if item.startswith('group-object')] for name,entries in groupEntries.items()}
+        levels,missing,cyclic = group_levels(groupDeps)
+        groupIndex = {}
+        unresolved = []
+        for names in levels:
+            for objName in names:
+                Obj,missing = build_network_group(objName,groupEntries[objName],objIndex,groupIndex)
+                unresolved += missing
+                groupIndex[objName] = {'type':'NetworkGroup','id':f'id-{objName}'}
+        elapsed = time.perf_counter()-start
+        print(f'{lines},{len(objIndex)},{len(groupIndex)},{elapsed:.3f},{elapsed/lines*1e6:.2f}')
+
+#
+#
+#
+# Generate synthetic ASA "show run" with roughly the requested number of lines
+#   Mixes network objects, object NAT, service objects, groups, and unrelated configuration
+def synthetic_show_run(lines,seed=1):
+    rand = random.Random(seed)
+    block = 0
+    count = 0
+    while count < lines:
+        i = block
+        block += 1
+        kind = i % 6
+        if kind == 0:
+            yield f'object network OBJ-{i}\n host 10.{i//65536%256}.{i//256%256}.{i%256}\n description host {i}\n'
+            count += 3
+        elif kind == 1:
+            yield f'object network NET6-{i}\n subnet 2001:db8:{i%65536:x}::/64\n'
+            count += 2
+        elif kind == 2:
+            yield f'object network OBJ-{i-2}\n nat (inside,outside) dynamic interface\n'
+            count += 2
+        elif kind == 3:
+            yield f'object service SVC-{i}\n service tcp destination eq {rand.choice(["www","https","ssh","8443"])}\n'
+            count += 2
+        elif kind == 4:
+            entries = ''.join(f' network-object object OBJ-{rand.randrange(max(block-4,1))//6*6}\n' for k in range(10))
+            yield f'object-group network GRP-{i}\n description group {i}\n{entries} network-object 2001:db8::/32\n'
+            count += 13
+        else:
+            yield f'object-group service PORTS-{i} tcp\n port-object eq www\n port-object range 8000 8080\n!\ninterface GigabitEthernet0/{i%8}\n nameif inside\n'
+            count += 6
+
+#
+#
+#
+# Benchmark streaming ASA parser throughput, and peak memory while parsing
+def bench_asa_parser(sizes=(250000,1000000)):
+    print('LINES,RECORDS,SECONDS,LINES_PER_SEC,PEAK_KB')
+    for lines in sizes:
+        fd,path = tempfile.mkstemp(suffix='.txt')
+        try:
+            with os.fdopen(fd,'w') as outfile:
+                outfile.writelines(synthetic_show_run(lines))
+            with open(path) as infile:
+                lines = sum(1 for line in infile)
+            start = time.perf_counter()
+            with open(path) as infile:
+                records = sum(1 for record in iter_asa_records(infile))
+            elapsed = time.perf_counter()-start
+            tracemalloc.start()
+            with open(path) as infile:
+                for record in iter_asa_records(infile):
+                    pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        finally:
+            os.remove(path)
+        print(f'{lines},{records},{elapsed:.3f},{lines/elapsed:.0f},{peak//1024}')
+
+#
+#
+#
+# Benchmark Object Group diff of obj_group_update
+#   objects Host and Network objects, half IPv6, group holds half of file entries
+def bench_group_diff(entries=100000,objects=200000):
+    print('ENTRIES,OBJECTS,INDEX_SECONDS,DIFF_SECONDS,MISSING,EXTRA,CREATE')
+    objs = []
+    for i in range(objects):
+        if i % 2:
+            objs.append({'id':f'id-{i}','name':f'Host-{i}','type':'Host','value':f'2001:db8::{i:x}'})
+        else:
+            objs.append({'id':f'id-{i}','name':f'Net-{i}','type':'Network','value':f'10.{i//65536%256}.{i//256%256}.{i%256}/32'})
+    fileEntries = [objs[i*objects//entries]['value'] for i in range(entries-entries//10)]
+    fileEntries += [f'172.{16+i//65536%16}.{i//256%256}.{i%256}' for i in range(entries//10)]
+    objGroup = {
+        'objects': [{'type':o['type'],'name':o['name'],'id':o['id']} for o in objs[::objects*2//entries]],
+        'literals': [{'type':'Network','value':f'192.168.{i%256}.0/24'} for i in range(256)]
+    }
+    start = time.perf_counter()
+    objIndex,values = index_network_objects(objs)
+    indexed = time.perf_counter()
+    diff = diff_network_group(objGroup,fileEntries,objIndex,values)
+    elapsed = time.perf_counter()
+    print(f'{len(fileEntries)},{objects},{indexed-start:.3f},{elapsed-indexed:.3f},{len(diff["missing"])},{len(diff["extra"])},{len(diff["create"])}')
+
+#
+#
+#
+# Generate synthetic inventory of device records, clusters and HA pairs
+#   A quarter of devices are cluster members, a quarter HA pair members, the rest standalone
+def synthetic_inventory(devices):
+    DEVICELIST_DATA = [{
+        'id': f'dev-{i}',
+        'name': f'ftd-{i}',
+        'model': 'Cisco Firepower Threat Defense for VMware',
+        'hostName': f'10.{i//65536%256}.{i//256%256}.{i%256}',
+        'healthStatus': 'green',
+        'sw_version': '6.7.0',
+        'license_caps': ['BASE','THREAT'],
+        'ftdMode': 'ROUTED',
+        'metadata': {'deviceSerialNumber':f'SN{i}','sruVersion':'sru','vdbVersion':'vdb','snortVersion':'2.9'}
+    } for i in range(devices)]
+    CLUSTER_DATA = [{
+        'name': f'cluster-{i}',
+        'masterDevice': {'id':f'dev-{i}'},
+        'slaveDevices': [{'id':f'dev-{i+1}'},{'id':f'dev-{i+2}'},{'id':f'dev-{i+3}'}]
+    } for i in range(0,devices//4,4)]
+    HA_DATA = [{
+        'name': f'ha-{i}',
+        'primary': {'id':f'dev-{i}'},
+        'secondary': {'id':f'dev-{i+1}'}
+    } for i in range(devices//4,devices//2,2)]
+    return DEVICELIST_DATA,CLUSTER_DATA,HA_DATA
+
+#
+#
+#
+# Join Cluster and HA Pair members with Device details, return Inventory dict
+#   Reference of the whole Inventory document, get_inventory streams iter_inventory to writers instead
+def compile_inventory(DEVICELIST_DATA,CLUSTER_DATA,HA_DATA):
+    # Create Base Dict
+    INVENTORY = {
+        'deviceClusters':[],
+        'deviceHAPairs':[],
+        'devices':[]
+        }
+
+    for section,name,role,device in iter_inventory(DEVICELIST_DATA,CLUSTER_DATA,HA_DATA):
+        if section == 'devices':
+            INVENTORY['devices'].append(device)
+        elif role == 'slaveDevices':
+            INVENTORY[section][-1]['slaveDevices'].append(device)
+        elif role == 'masterDevice':
+            INVENTORY[section].append({'name':name,'masterDevice':device,'slaveDevices':[]})
+        elif role == 'primary':
+            INVENTORY[section].append({'name':name,'primary':device})
+        else:
+            INVENTORY[section][-1]['secondary'] = device
+    return INVENTORY
+
+#
+#
+#
+# Benchmark Inventory assembly of get_inventory
+def bench_inventory(sizes=(1000,10000)):
+    print('DEVICES,CLUSTERS,HA_PAIRS,STANDALONE,SECONDS')
+    for devices in sizes:
+        DEVICELIST_DATA,CLUSTER_DATA,HA_DATA = synthetic_inventory(devices)
+        start = time.perf_counter()
+        INVENTORY = compile_inventory(DEVICELIST_DATA,CLUSTER_DATA,HA_DATA)
+        elapsed = time.perf_counter()-start
+        print(f'{devices},{len(INVENTORY["deviceClusters"])},{len(INVENTORY["deviceHAPairs"])},{len(INVENTORY["devices"])},{elapsed:.3f}')
+
+#
+#
+#
+# Reference parse_rule, hand-written branches replaced by RULE_FIELDS spec
+#   Used to check identical output, and as baseline for rules/s
+def parse_rule_reference(FMC_NAME,rule):
+    if 'prefilterPolicy' in rule['metadata']:
+        ACP_NAME    = rule['metadata']['prefilterPolicy']['name']
+        ACP_TYPE    = rule['metadata']['prefilterPolicy']['type']
+        ACP_ID      = rule['metadata']['prefilterPolicy']['id']
+    else:
+        ACP_NAME    = rule['metadata']['accessPolicy']['name']
+        ACP_TYPE    = rule['metadata']['accessPolicy']['type']
+        ACP_ID      = rule['metadata']['accessPolicy']['id']
+    R_NAME      = rule['name']
+    R_ID        = rule['id']
+    R_ACTION    = rule['action']
+    R_SRC_ZN    = ''
+    R_DST_ZN    = ''
+    R_SRC_IP    = ''
+    R_DST_IP    = ''
+    R_VLAN      = ''
+    R_USERS     = ''
+    R_APP       = 'false'
+    R_URL       = 'false'
+    R_SRC_P     = ''
+    R_DST_P     = ''
+    R_SRC_SGT   = ''
+    R_DST_SGT   = ''
+    R_IPS       = ''
+    R_FILE      = ''
+
+    # Source Zones
+    if 'sourceZones' in rule:
+        temp_list = [i['name'] for i in rule['sourceZones']['objects']]
+        if len(temp_list) > 1:
+            R_SRC_ZN = '; '.join(temp_list)
+        else:
+            R_SRC_ZN = temp_list[0]
+    # Destination Zones
+    if 'destinationZones' in rule:
+        temp_list = [i['name'] for i in rule['destinationZones']['objects']]
+        if len(temp_list) > 1:
+            R_DST_ZN = '; '.join(temp_list)
+        else:
+            R_DST_ZN = temp_list[0]
+    # Source Zones for Prefilter Rules
+    if 'sourceInterfaces' in rule:
+        temp_list = [i['name'] for i in rule['sourceInterfaces']['objects']]
+        if len(temp_list) > 1:
+            R_SRC_ZN = '; '.join(temp_list)
+        else:
+            R_SRC_ZN = temp_list[0]
+    # Destination Zones for Prefilter Rules
+    if 'destinationInterfaces' in rule:
+        temp_list = [i['name'] for i in rule['destinationInterfaces']['objects']]
+        if len(temp_list) > 1:
+            R_DST_ZN = '; '.join(temp_list)
+        else:
+            R_DST_ZN = temp_list[0]
+    # Source Networks
+    if 'sourceNetworks' in rule:
+        lits = ''
+        objs = ''
+        if 'literals' in rule['sourceNetworks']:
+            temp_list = [i['value'] for i in rule['sourceNetworks']['literals']]
+            if len(temp_list) > 1:
+                lits = '; '.join(temp_list)
+            else:
+                lits = temp_list[0]
+        if 'objects' in rule['sourceNetworks']:
+            temp_list = [i['name'] for i in rule['sourceNetworks']['objects']]
+            if len(temp_list) > 1:
+                objs = '; '.join(temp_list)
+            else:
+                objs = temp_list[0]
+        if (lits != '') and (objs != ''):
+            R_SRC_IP = '; '.join([lits,objs])
+        elif lits != '':
+            R_SRC_IP = lits
+        elif objs != '':
+            R_SRC_IP = objs
+    # Destination Networks
+    if 'destinationNetworks' in rule:
+        lits = ''
+        objs = ''
+        if 'literals' in rule['destinationNetworks']:
+            temp_list = [i['value'] for i in rule['destinationNetworks']['literals']]
+            if len(temp_list) > 1:
+                lits = '; '.join(temp_list)
+            else:
+                lits = temp_list[0]
+        if 'objects' in rule['destinationNetworks']:
+            temp_list = [i['name'] for i in rule['destinationNetworks']['objects']]
+            if len(temp_list) > 1:
+                objs = '; '.join(temp_list)
+            else:
+                objs = temp_list[0]
+        if (lits != '') and (objs != ''):
+            R_DST_IP = '; '.join([lits,objs])
+        elif lits != '':
+            R_DST_IP = lits
+        elif objs != '':
+            R_DST_IP = objs
+    # VLAN Tags
+    if 'vlanTags' in rule:
+        lits = ''
+        objs = ''
+        if 'literals' in rule['vlanTags']:
+            temp_list = []
+            for i in rule['vlanTags']['literals']:
+                if i['startTag'] == i['endTag']:
+                    temp_list.append(str(i['startTag']))
+                else:
+                    temp_list.append(f'{i["startTag"]}-{i["endTag"]}')
+            if len(temp_list) > 1:
+                lits = '; '.join(temp_list)
+            else:
+                lits = temp_list[0]
+        if 'objects' in rule['vlanTags']:
+            temp_list = [i['name'] for i in rule['vlanTags']['objects']]
+            if len(temp_list) > 1:
+                objs = '; '.join(temp_list)
+            else:
+                objs = temp_list[0]
+        if (lits != '') and (objs != ''):
+            R_VLAN = '; '.join([lits,objs])
+        elif lits != '':
+            R_VLAN = lits
+        elif objs != '':
+            R_VLAN = objs
+    # Users
+    if 'users' in rule:
+        temp_list = [i['name'] for i in rule['users']['objects']]
+        if len(temp_list) > 1:
+            R_USERS = '; '.join(temp_list)
+        else:
+            R_USERS = temp_list[0]
+    # Application Filters, Too complext to represent simply.
+    # Using true/false to represent if configured or not
+    if 'applications' in rule:
+        R_APP = 'true'
+    # URL Reputation Filters, Too complext to represent simply.
+    # Using true/false to represent if configured or not
+    if 'urls' in rule:
+        R_URL = 'true'
+    # Source Ports
+    if 'sourcePorts' in rule:
+        lits = ''
+        objs = ''
+        if 'literals' in rule['sourcePorts']:
+            temp_list = []
+            for i in rule['sourcePorts']['literals']:
+                if i['protocol'] == '6':
+                    temp_list.append(f'TCP:{i["port"]}')
+                elif i['protocol'] == '17':
+                    temp_list.append(f'UDP:{i["port"]}')
+            if len(temp_list) > 1:
+                lits = '; '.join(temp_list)
+            else:
+                lits = temp_list[0]
+        if 'objects' in rule['sourcePorts']:
+            temp_list = [i['name'] for i in rule['sourcePorts']['objects']]
+            if len(temp_list) > 1:
+                objs = '; '.join(temp_list)
+            else:
+                objs = temp_list[0]
+        if (lits != '') and (objs != ''):
+            R_SRC_P = '; '.join([lits,objs])
+        elif lits != '':
+            R_SRC_P = lits
+        elif objs != '':
+            R_SRC_P = objs
+    # Destination Ports
+    if 'destinationPorts' in rule:
+        lits = ''
+        objs = ''
+        if 'literals' in rule['destinationPorts']:
+            temp_list = []
+            for i in rule['destinationPorts']['literals']:
+                if i['protocol'] == '6':
+                    temp_list.append(f'TCP:{i["port"]}')
+                elif i['protocol'] == '17':
+                    temp_list.append(f'UDP:{i["port"]}')
+            if len(temp_list) > 1:
+                lits = '; '.join(temp_list)
+            else:
+                lits = temp_list[0]
+        if 'objects' in rule['destinationPorts']:
+            temp_list = [i['name'] for i in rule['destinationPorts']['objects']]
+            if len(temp_list) > 1:
+                objs = '; '.join(temp_list)
+            else:
+                objs = temp_list[0]
+        if (lits != '') and (objs != ''):
+            R_DST_P = '; '.join([lits,objs])
+        elif lits != '':
+            R_DST_P = lits
+        elif objs != '':
+            R_DST_P = objs
+    # Encapsulation Ports, equivalent to Destination Ports for Prefilter
+    if 'encapsulationPorts' in rule:
+        if len(rule['encapsulationPorts']) > 1:
+            R_DST_P = '; '.join(rule['encapsulationPorts'])
+        else:
+            R_DST_P = rule['encapsulationPorts'][0]
+    # Source SGTs
+    if 'sourceSecurityGroupTags' in rule:
+        temp_list = [i['name'] for i in rule['sourceSecurityGroupTags']['objects']]
+        if len(temp_list) > 1:
+            R_SRC_SGT = '; '.join(temp_list)
+        else:
+            R_SRC_SGT = temp_list[0]
+    # Destination SGTs
+    if 'destinationSecurityGroupTags' in rule:
+        temp_list = [i['name'] for i in rule['destinationSecurityGroupTags']['objects']]
+        if len(temp_list) > 1:
+            R_DST_SGT = '; '.join(temp_list)
+        else:
+            R_DST_SGT = temp_list[0]
+    # IPS Policy
+    if 'ipsPolicy' in rule:
+        R_IPS = rule['ipsPolicy']['name']
+    # File Policy
+    if 'filePolicy' in rule:
+        R_FILE = rule['filePolicy']['name']
+
+    temp_list = [
+        FMC_NAME,
+        ACP_NAME,
+        ACP_TYPE,
+        ACP_ID,
+        R_NAME,
+        R_ID,
+        R_ACTION,
+        R_SRC_ZN,
+        R_DST_ZN,
+        R_SRC_IP,
+        R_DST_IP,
+        R_VLAN,
+        R_USERS,
+        R_APP,
+        R_URL,
+        R_SRC_P,
+        R_DST_P,
+        R_SRC_SGT,
+        R_DST_SGT,
+        R_IPS,
+        R_FILE,
+    ]
+    return temp_list
+
+#
+#
+#
+# Generate synthetic expanded Access and Prefilter rules, covering every exported field
+def synthetic_rules(count,seed=1):
+    rand = random.Random(seed)
+    rules = []
+    for i in range(count):
+        names = lambda prefix: {'objects':[{'name':f'{prefix}-{k}'} for k in range(rand.randint(1,3))]}
+        if i % 10 == 0:
+            rule = {
+                'id': f'pf-{i}',
+                'name': f'Prefilter-{i}',
+                'action': 'FASTPATH',
+                'metadata': {'prefilterPolicy':{'name':'Default Prefilter','type':'PrefilterPolicy','id':'pf'}},
+                'sourceInterfaces': names('in'),
+                'destinationInterfaces': names('out'),
+                'encapsulationPorts': ['GRE','IP_IN_IP'][:rand.randint(1,2)]
+            }
+        else:
+            rule = {
+                'id': f'rule-{i}',
+                'name': f'Rule-{i}',
+                'action': rand.choice(['ALLOW','BLOCK','TRUST']),
+                'metadata': {'accessPolicy':{'name':f'ACP-{i%7}','type':'AccessPolicy','id':f'acp-{i%7}'}},
+                'sourceZones': names('zone'),
+                'destinationZones': names('zone'),
+                'sourceNetworks': {'literals':[{'value':f'10.{k}.{i%256}.0/24'} for k in range(rand.randint(1,4))],'objects':[{'name':f'Net-{i%100}'}]},
+                'destinationNetworks': {'objects':[{'name':f'Net-{k}'} for k in range(rand.randint(1,5))]},
+                'destinationPorts': {'literals':[{'protocol':'6','port':'443'},{'protocol':'17','port':'53'},{'protocol':'1'}][:rand.randint(1,2)],'objects':[{'name':'HTTP'}]}
+            }
+            if i % 3 == 0:
+                rule['vlanTags'] = {'literals':[{'startTag':1,'endTag':1},{'startTag':2,'endTag':5}],'objects':[{'name':'VLANS'}]}
+                rule['users'] = names('user')
+                rule['applications'] = {'applications':[{'name':'SSH'}]}
+                rule['sourcePorts'] = {'literals':[{'protocol':'6','port':'1024-65535'}]}
+                rule['sourceSecurityGroupTags'] = names('sgt')
+                rule['destinationSecurityGroupTags'] = names('sgt')
+            if i % 4 == 0:
+                rule['urls'] = {'urlCategoriesWithReputation':[]}
+                rule['ipsPolicy'] = {'name':'Balanced Security and Connectivity'}
+                rule['filePolicy'] = {'name':'Malware'}
+        rules.append(rule)
+    return rules
+
+#
+#
+#
+# Benchmark parse_rule against reference implementation, checking identical output
+def bench_parse_rule(count=200000,repeat=5):
+    rules = synthetic_rules(count)
+    implementations = [('reference',parse_rule_reference),('parse_rule',parse_rule)]
+    best = {name:0.0 for name,func in implementations}
+    # Interleave runs, and keep best rate of each implementation
+    for i in range(repeat):
+        for name,func in implementations:
+            start = time.perf_counter()
+            for rule in rules:
+                func('fmc.example.com',rule)
+            best[name] = max(best[name],count/(time.perf_counter()-start))
+    print('IMPLEMENTATION,RULES,RULES_PER_SEC')
+    for name,func in implementations:
+        print(f'{name},{count},{best[name]:.0f}')
+    identical = all(parse_rule_reference('fmc.example.com',rule) == parse_rule('fmc.example.com',rule) for rule in rules)
+    print(f'Identical output: {identical}')
+
+#
+#
+#
+# Benchmark ACP export parse pipeline, raw pages of rules decoded and parsed in process pool while next pages are collected
+#   Collection of each page is simulated by latency seconds, parsed pages are consumed in page order
+def bench_parse_pool(count=200000,latency=0.02,processes=(0,2,4)):
+    rules = synthetic_rules(count)
+    pages = [json.dumps({'items':rules[i:i+BULK_LIMIT]}).encode() for i in range(0,count,BULK_LIMIT)]
+    print('PROCESSES,RULES,SECONDS,RULES_PER_SEC')
+    for size in processes:
+        with RuleParser('fmc.example.com',size) as parser:
+            start = time.perf_counter()
+            futures = []
+            for page in pages:
+                time.sleep(latency)
+                futures.append(parser.submit(page))
+            parsed = sum(len(future.result()[1]) for future in futures)
+            elapsed = time.perf_counter()-start
+        print(f'{size},{parsed},{elapsed:.2f},{parsed/elapsed:.0f}')
+
+#
+#
+#
+# Benchmark rule export writers, rows/s and file size for each format
+def bench_export_sinks(count=200000):
+    rows = [parse_rule('fmc.example.com',rule) for rule in synthetic_rules(count)]
+    print('FORMAT,ROWS,SECONDS,ROWS_PER_SEC,BYTES')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for fmt,writer in RULE_WRITERS.items():
+            path = os.path.join(tmpdir,f'export.{writer.EXTENSION}')
+            start = time.perf_counter()
+            outfile = writer(path)
+            for temp_list in rows:
+                outfile.write(temp_list)
+            outfile.close()
+            elapsed = time.perf_counter()-start
+            print(f'{fmt},{count},{elapsed:.2f},{count/elapsed:.0f},{os.path.getsize(path)}')
+
+BENCHMARKS = {
+    'group_resolution': bench_group_resolution,
+    'asa_parser': bench_asa_parser,
+    'group_diff': bench_group_diff,
+    'inventory': bench_inventory,
+    'parse_rule': bench_parse_rule,
+    'parse_pool': bench_parse_pool,
+    'export_sinks': bench_export_sinks
+}
+
+
+#
+#
+#
+# Run Benchmarks if main, all benchmarks unless names are provided
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f'*\n*\nBENCHMARK {name}...')
+        BENCHMARKS[name]()
@@ -4,12 +4,63 @@ import re
 import sys
 import csv
 import json
+import gzip
+import sqlite3
+import hashlib
+import time
 import socket
 import random
 import netaddr
+import ipaddress
 import getpass
 import requests
+import threading
+import multiprocessing
 import traceback
+from collections import deque
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+
+# FMC allows 120 API requests per minute, and 10 simultaneous connections per user
+RATE_LIMIT = 120
+MAX_PARALLEL = 10
+# FMC caps bulk requests at 1000 items
+BULK_LIMIT = 1000
+# Adaptive bulk PUT chunk size, starting at BULK_START and kept between BULK_MIN and BULK_LIMIT
+#   Chunks completing within BULK_FAST seconds double the size, timeouts, 413 and 5xx halve it
+BULK_MIN = 25
+BULK_START = 250
+BULK_FAST = 15
+# Maximum attempts for a request rejected with 429 Too Many Requests
+MAX_RETRIES = 5
+# Retries of a collection page failing with connection error, timeout or 5xx
+PAGE_RETRIES = 3
+# Access Tokens expire after 30 minutes, and may be refreshed 3 times
+TOKEN_REFRESH_AFTER = 25*60
+TOKEN_MAX_REFRESH = 3
+# Seconds before cached Object Index is rebuilt
+OBJECT_INDEX_TTL = 15*60
+# Targeted lookups are used only below this number of requests, and when fewer than collection pages
+#   Keeps lookups well inside the 120 requests per minute rate limit
+FIND_LIMIT = 20
+# Processes parsing rules of ACP export, one core is left for collecting and writing
+#   0 parses in the collecting threads
+PARSE_PROCESSES = max((os.cpu_count() or 1)-1,0)
+# Rows per batched insert of SQLite rule export
+EXPORT_BATCH = 10000
+# Device details collected by deep Inventory
+DEVICE_DETAIL_KEYS = ['interfaces','healthAlerts','deploymentStatus']
+# Network Object types, and their API collection
+OBJECT_TYPES = {
+    'Host': 'hosts',
+    'Network': 'networks',
+    'Range': 'ranges',
+    'FQDN': 'fqdns',
+    'NetworkGroup': 'networkgroups'
+}
 
 
 #
@@ -29,132 +80,579 @@ def define_password():
 #
 #
 #
-# Define Generate Access Token Function
-def access_token(server,headers,username,password):
-    auth_url = f'{server}/api/fmc_platform/v1/auth/generatetoken'
-    try:
-        # REST call with SSL verification turned off:
-        r = requests.post(auth_url, headers=headers, auth=requests.auth.HTTPBasicAuth(username,password), verify=False)
-        print(r.status_code)
-        auth_token = r.headers['X-auth-access-token']
-        domains = json.loads(r.headers['DOMAINS'])
-        if auth_token == None:
-            print('auth_token not found. Exiting...')
+# Token Bucket Rate Limiter, shared by all threads using the same FMC Client
+#   Bucket refills so burst plus refill over 60 seconds never exceeds rate_limit
+class RateLimiter:
+    def __init__(self,rate_limit=RATE_LIMIT,burst=MAX_PARALLEL):
+        self.rate_limit = rate_limit
+        self.burst = min(burst,rate_limit)
+        self.refill = max(rate_limit-self.burst,1)/60
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'throttled': 0,
+            'throttled_time': 0.0,
+            'wait_time': 0.0
+        }
+
+    # Take a token if available and return 0, otherwise return seconds until one is
+    def try_acquire(self,waited=0.0):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst,self.tokens+(now-self.updated)*self.refill)
+            self.updated = now
+            if now >= self.paused_until and self.tokens >= 1:
+                self.tokens -= 1
+                self.stats['requests'] += 1
+                self.stats['wait_time'] += waited
+                return 0
+            return max(self.paused_until-now,(1-self.tokens)/self.refill)
+
+    # Block until a token is available, return seconds waited
+    def acquire(self):
+        waited = 0.0
+        delay = self.try_acquire()
+        while delay:
+            time.sleep(delay)
+            waited += delay
+            delay = self.try_acquire(waited)
+        return waited
+
+    # Pause all requests after 429 response, and empty bucket
+    def throttle(self,delay):
+        with self.lock:
+            self.stats['throttled'] += 1
+            self.stats['throttled_time'] += delay
+            self.paused_until = max(self.paused_until,time.monotonic()+delay)
+            self.tokens = 0
+
+    def report(self):
+        return (f'API requests: {self.stats["requests"]}, '
+            f'Throttled (429): {self.stats["throttled"]}, '
+            f'Throttled time: {self.stats["throttled_time"]:.1f}s, '
+            f'Rate limit wait time: {self.stats["wait_time"]:.1f}s')
+
+#
+#
+#
+# Seconds to wait before retrying 429 response
+#   Honors Retry-After header, otherwise exponential backoff with jitter
+def retry_delay(r,attempt):
+    retry_after = r.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(float(retry_after),0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(retry_after).timestamp()-time.time(),0)
+            except (TypeError,ValueError):
+                None
+    return min(2**attempt,60) + random.uniform(0,1)
+
+#
+#
+#
+# Access Token Manager, generates token once and shares it among threads
+#   Token is refreshed before expiry, and regenerated once refresh limit is reached
+class TokenManager:
+    def __init__(self,client):
+        self.client = client
+        self.access_token = None
+        self.refresh_token = None
+        self.domains = []
+        self.created = 0
+        self.refresh_count = 0
+        self.lock = threading.Lock()
+
+    # Return valid Access Token, generating or refreshing as required
+    def token(self):
+        with self.lock:
+            if not self.access_token:
+                self.generate()
+            elif time.monotonic() - self.created > TOKEN_REFRESH_AFTER:
+                if self.refresh_count < TOKEN_MAX_REFRESH:
+                    self.refresh()
+                else:
+                    self.generate()
+            return self.access_token
+
+    # Discard Access Token rejected by FMC, unless already replaced by another thread
+    def invalidate(self,token):
+        with self.lock:
+            if self.access_token == token:
+                self.access_token = None
+
+    # Generate Access Token and pull domains from auth headers
+    def generate(self):
+        print('Generating Access Token')
+        auth_url = f'{self.client.server}/api/fmc_platform/v1/auth/generatetoken'
+        try:
+            # REST call with SSL verification turned off:
+            r = self.client.send('POST', auth_url, auth=requests.auth.HTTPBasicAuth(self.client.username,self.client.password))
+            print(r.status_code)
+            auth_token = r.headers['X-auth-access-token']
+            domains = json.loads(r.headers['DOMAINS'])
+            if auth_token == None:
+                print('auth_token not found. Exiting...')
+                sys.exit()
+        except Exception as err:
+            print (f'Error in generating auth token --> {traceback.format_exc()}')
+            print(r.headers)
             sys.exit()
-    except Exception as err:
-        print (f'Error in generating auth token --> {traceback.format_exc()}')
-        print(r.headers)
-        sys.exit()
-    return auth_token,domains
+        self.access_token = auth_token
+        self.refresh_token = r.headers.get('X-auth-refresh-token')
+        self.domains = domains
+        self.created = time.monotonic()
+        self.refresh_count = 0
+
+    # Refresh Access Token, falling back to generating a new token
+    def refresh(self):
+        print('Refreshing Access Token')
+        auth_url = f'{self.client.server}/api/fmc_platform/v1/auth/refreshtoken'
+        headers = {
+            'X-auth-access-token': self.access_token,
+            'X-auth-refresh-token': self.refresh_token
+        }
+        try:
+            # REST call with SSL verification turned off:
+            r = self.client.send('POST', auth_url, headers=headers)
+            self.access_token = r.headers['X-auth-access-token']
+            self.refresh_token = r.headers['X-auth-refresh-token']
+            self.created = time.monotonic()
+            self.refresh_count += 1
+        except Exception as err:
+            print (f'Error in refreshing auth token --> {traceback.format_exc()}')
+            self.generate()
 
 #
 #
-# Get Device Details from Inventory List
-# And Delete item from Inventory List
-def get_device_details(ID,DeviceList):
+#
+# FMC Client, owns one pooled keep-alive Session shared by every tool
+class FmcClient:
+    def __init__(self,server,username,password,pool_size=MAX_PARALLEL,timeout=(10,300),verify=False,rate_limit=RATE_LIMIT,max_retries=MAX_RETRIES):
+        self.server = server
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.verify = verify
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        }
+        # Size connection pool to match concurrent requests allowed per user
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,pool_maxsize=pool_size)
+        self.session.mount('https://',adapter)
+        self.session.mount('http://',adapter)
+        self.session.headers.update(self.headers)
+        self.session.verify = verify
+        self.pool_size = pool_size
+        # All requests are scheduled through shared Rate Limiter
+        self.limiter = RateLimiter(rate_limit,pool_size)
+        self.max_retries = max_retries
+        # Access Token shared by every tool and thread
+        self.tokens = TokenManager(self)
+        # Cached Object Index per domain
+        self.indexes = {}
+        self.indexes_lock = threading.Lock()
+        # Optional local Object Store, see fmc_object_store.py
+        self.store = None
+
+    # Perform REST call using pooled Session, with per-request timeout
+    #   Requests rejected with 429 are retried after Retry-After or backoff delay
+    def send(self,method,url,**kwargs):
+        kwargs.setdefault('timeout',self.timeout)
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            r = self.session.request(method,url,**kwargs)
+            if r.status_code != 429 or attempt >= self.max_retries:
+                return r
+            attempt += 1
+            delay = retry_delay(r,attempt)
+            print(f'Rate limit exceeded (429), retrying in {delay:.1f}s... {url}')
+            r.close()
+            self.limiter.throttle(delay)
+
+    # Perform authenticated REST call
+    #   Requests rejected with 401 are retried once with a new Access Token
+    def request(self,method,url,**kwargs):
+        headers = dict(kwargs.pop('headers',None) or {})
+        for attempt in range(2):
+            token = self.tokens.token()
+            headers['X-auth-access-token'] = token
+            r = self.send(method,url,headers=headers,**kwargs)
+            if r.status_code != 401:
+                break
+            print('Access token invalid... Attempting to Renew Token...')
+            r.close()
+            self.tokens.invalidate(token)
+        return r
+
+    # Return domains available to user from shared Access Token
+    def domains(self):
+        self.tokens.token()
+        return self.tokens.domains
+
+    def get(self,url,**kwargs):
+        return self.request('GET',url,**kwargs)
+
+    def post(self,url,**kwargs):
+        return self.request('POST',url,**kwargs)
+
+    def put(self,url,**kwargs):
+        return self.request('PUT',url,**kwargs)
+
+    def delete(self,url,**kwargs):
+        return self.request('DELETE',url,**kwargs)
+
+    # Return cached Object Index for domain
+    def object_index(self,API_UUID):
+        with self.indexes_lock:
+            if API_UUID not in self.indexes:
+                self.indexes[API_UUID] = ObjectIndex(self,API_UUID)
+            return self.indexes[API_UUID]
+
+    def close(self):
+        self.session.close()
+
+#
+#
+# Trim Device Record to fields used for Inventory List
+def get_device_record(item):
+    temp_dict = {}
+    for key in ['id','name','model','hostName','healthStatus','sw_version','license_caps','ftdMode']:
+        if key in item: temp_dict[key] = item[key]
+    temp_dict['metadata'] = {}
+    for key in ['deviceSerialNumber','sruVersion','vdbVersion','snortVersion','chassisData']:
+        if key in item['metadata']: temp_dict['metadata'][key] = item['metadata'][key]
+    return temp_dict
+
+#
+#
+# Get Device Details from Device Index
+# And mark device consumed, consumed devices are not returned again
+def get_device_details(ID,Devices,consumed):
     temp_dict = {}
-    for item in DeviceList:
-        if item['id']==ID:
-          temp_dict['name'] = item['name']
-          temp_dict['model'] = item['model']
-          temp_dict['healthStatus'] = item['healthStatus']
-          temp_dict['sw_version'] = item['sw_version']
-          temp_dict['license_caps'] = item['license_caps']
-          if 'ftdMode' in item: temp_dict['ftdMode'] = item['ftdMode']
-          if 'sruVersion' in item['metadata']: temp_dict['sru_version'] = item['metadata']['sruVersion']
-          if 'vdbVersion' in item['metadata']: temp_dict['vdb_version'] = item['metadata']['vdbVersion']
-          if 'snortVersion' in item['metadata']: temp_dict['snort_version'] = item['metadata']['snortVersion']
-          if 'chassisData' in item['metadata']: temp_dict['chassisData'] = item['metadata']['chassisData']
-          # Delete item from Device List
-          DeviceList.pop(DeviceList.index(item))
+    item = Devices.get(ID)
+    if item and (ID not in consumed):
+        temp_dict['name'] = item['name']
+        temp_dict['model'] = item['model']
+        temp_dict['healthStatus'] = item['healthStatus']
+        temp_dict['sw_version'] = item['sw_version']
+        temp_dict['license_caps'] = item['license_caps']
+        if 'ftdMode' in item: temp_dict['ftdMode'] = item['ftdMode']
+        if 'sruVersion' in item['metadata']: temp_dict['sru_version'] = item['metadata']['sruVersion']
+        if 'vdbVersion' in item['metadata']: temp_dict['vdb_version'] = item['metadata']['vdbVersion']
+        if 'snortVersion' in item['metadata']: temp_dict['snort_version'] = item['metadata']['snortVersion']
+        if 'chassisData' in item['metadata']: temp_dict['chassisData'] = item['metadata']['chassisData']
+        for key in DEVICE_DETAIL_KEYS:
+            if key in item: temp_dict[key] = item[key]
+        consumed.add(ID)
     return temp_dict
 
 
 #
 #
+# Get Device Details for standalone Device
+def get_standalone_details(item):
+    temp_dict = {}
+    temp_dict['name'] = item['name']
+    temp_dict['model'] = item['model']
+    temp_dict['hostname'] = item['hostName']
+    temp_dict['healthStatus'] = item['healthStatus']
+    temp_dict['sw_version'] = item['sw_version']
+    temp_dict['license_caps'] = item['license_caps']
+    temp_dict['ftdMode'] = ''
+    if 'ftdMode' in item: temp_dict['ftdMode'] = item['ftdMode']
+    temp_dict['deviceSerialNumber'] = ''
+    if 'deviceSerialNumber' in item['metadata']: temp_dict['deviceSerialNumber'] = item['metadata']['deviceSerialNumber']
+    if 'sruVersion' in item['metadata']: temp_dict['sru_version'] = item['metadata']['sruVersion']
+    if 'vdbVersion' in item['metadata']: temp_dict['vdb_version'] = item['metadata']['vdbVersion']
+    if 'snortVersion' in item['metadata']: temp_dict['snort_version'] = item['metadata']['snortVersion']
+    if 'chassisData' in item['metadata']: temp_dict['chassisData'] = item['metadata']['chassisData']
+    for key in DEVICE_DETAIL_KEYS:
+        if key in item: temp_dict[key] = item[key]
+    return temp_dict
+
+
 #
-# Get Net Object UUID
-def get_net_object_uuid(server,API_UUID,headers,ObjectName,outfile):
-    # Create Get DATA JSON Dictionary to collect data from GET calls
-    GetDATA = {}
-    GetDATA['items'] = []
-    try:
-        # Collect Network Objects
-        url_get = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/networks?offset=0&limit=1000'
-        # REST call with SSL verification turned off
-        r = requests.get(url_get, headers=headers, verify=False)
-        status_code = r.status_code
-        resp = r.text
-        print(f'Status code is: {status_code}')
-        json_resp = r.json()
-        if status_code == 200:
-            # Loop for First Page of Items
-            for item in json_resp['items']:
-                # Append Items to New Dictionary
-                GetDATA['items'].append({'name': item['name'],'id': item['id']})
-            while json_resp['paging'].__contains__('next'):
-                url_get = json_resp['paging']['next'][0]
-                try:
-                    # REST call with SSL verification turned off
-                    r = requests.get(url_get, headers=headers, verify=False)
-                    status_code = r.status_code
-                    resp = r.text
-                    print(f'Status code is: {status_code}')
-                    json_resp = r.json()
-                    if status_code == 200:
-                        # Loop for First Page of Items
-                        for item in json_resp['items']:
-                            # Append Items to New Dictionary
-                            GetDATA['items'].append({'name': item['name'],'id': item['id']})
-                except requests.exceptions.HTTPError as err:
-                    print (f'Error in connection --> {err}')
-                    outfile.write(f'Error occurred in POST --> {resp}\n{ObjectName}\n')
-        # Collect Host Objects
-        url_get = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/hosts?offset=0&limit=1000'
-        # REST call with SSL verification turned off
-        r = requests.get(url_get, headers=headers, verify=False)
-        status_code = r.status_code
-        resp = r.text
-        print(f'Status code is: {status_code}')
-        json_resp = r.json()
-        if status_code == 200:
-            # Loop for First Page of Items
-            for item in json_resp['items']:
-                # Append Items to New Dictionary
-                GetDATA['items'].append({'name': item['name'],'id': item['id']})
-            while json_resp['paging'].__contains__('next'):
-                url_get = json_resp['paging']['next'][0]
-                try:
-                    # REST call with SSL verification turned off
-                    r = requests.get(url_get, headers=headers, verify=False)
-                    status_code = r.status_code
-                    resp = r.text
-                    print(f'Status code is: {status_code}')
-                    json_resp = r.json()
-                    if status_code == 200:
-                        # Loop for First Page of Items
-                        for item in json_resp['items']:
-                            # Append Items to New Dictionary
-                            GetDATA['items'].append({'name': item['name'],'id': item['id']})
-                except requests.exceptions.HTTPError as err:
-                    print (f'Error in connection --> {err}')
-                    outfile.write(f'Error occurred in POST --> {resp}\n{ObjectName}\n')
-                try:
-                    if r: r.close()
-                except:
-                    None
-    except requests.exceptions.HTTPError as err:
-        print (f'Error in connection --> {err}')
-        outfile.write(f'Error occurred in POST --> {resp}\n{ObjectName}\n')
+#
+# Join Cluster and HA Pair members with Device details, yield each Device as soon as joined
+#   Yields (inventory section, Cluster/HA Pair name, role, device details)
+#   Devices are indexed by id, devices not consumed by Clusters or HA Pairs are standalone
+def iter_inventory(DEVICELIST_DATA,CLUSTER_DATA,HA_DATA):
+    Devices = {item['id']:item for item in DEVICELIST_DATA}
+    consumed = set()
+
+    for item in CLUSTER_DATA:
+        yield 'deviceClusters',item['name'],'masterDevice',get_device_details(item['masterDevice']['id'],Devices,consumed)
+        for device in item['slaveDevices']:
+            yield 'deviceClusters',item['name'],'slaveDevices',get_device_details(device['id'],Devices,consumed)
+
+    for item in HA_DATA:
+        yield 'deviceHAPairs',item['name'],'primary',get_device_details(item['primary']['id'],Devices,consumed)
+        yield 'deviceHAPairs',item['name'],'secondary',get_device_details(item['secondary']['id'],Devices,consumed)
+
+    for item in DEVICELIST_DATA:
+        if item['id'] not in consumed:
+            yield 'devices','','standalone',get_standalone_details(item)
+
+
+#
+#
+# Open output file for writing, gzip compressed when path ends with .gz
+def open_output(path):
+    if path.endswith('.gz'):
+        return gzip.open(path,'wt',newline='')
+    return open(path,'w',newline='')
+
+#
+#
+# Streaming Inventory writer, one CSV row per Device
+class InventoryCsvWriter:
+    HEADER = ['NAME','MODEL','VERSION','STATUS','SERIAL','MODE','LICENSE','SRU','VDB','SNORT','ROLE','GROUP']
+
+    def __init__(self,path):
+        self.path = path
+        self.outfile = open_output(path)
+        self.writer = csv.writer(self.outfile,lineterminator='\n')
+        self.writer.writerow(self.HEADER)
+
+    def write(self,section,name,role,device):
+        if not device:
+            return
+        serial = device.get('deviceSerialNumber','')
+        if 'chassisData' in device: serial = device['chassisData']['chassisSerialNo']
+        self.writer.writerow([
+            device['name'],
+            device['model'],
+            device['sw_version'],
+            device['healthStatus'],
+            serial,
+            device.get('ftdMode',''),
+            ';'.join(device['license_caps']),
+            device.get('sru_version',''),
+            device.get('vdb_version',''),
+            device.get('snort_version',''),
+            role,
+            name
+        ])
+
+    def close(self):
+        self.outfile.close()
+
+#
+#
+# Streaming Inventory writer, one JSON object per line per Device
+class InventoryJsonlWriter:
+    def __init__(self,path):
+        self.path = path
+        self.outfile = sys.stdout if path == '-' else open_output(path)
+
+    def write(self,section,name,role,device):
+        record = {'section':section,'group':name,'role':role}
+        record.update(device)
+        self.outfile.write(f'{json.dumps(record)}\n')
+
+    def close(self):
+        if self.outfile is not sys.stdout:
+            self.outfile.close()
+
+# Inventory output formats, and their writer
+INVENTORY_WRITERS = {
+    'jsonl': InventoryJsonlWriter,
+    'csv': InventoryCsvWriter
+}
+
+#
+#
+# Write each Device to every writer as it is joined, return count of Devices written
+def write_inventory(records,writers):
+    count = 0
     try:
-        if r: r.close()
-    except:
-        None
-
-    for item in GetDATA['items']:
-        if item['name'] == ObjectName:
-            # Pull Object UUID from json_resp data
-            ObjectID = item['id']
+        for record in records:
+            for writer in writers:
+                writer.write(*record)
+            count += 1
+    finally:
+        for writer in writers:
+            writer.close()
+    return count
+
+#
+#
+# Save Inventory to JSON Lines and/or CSV file, streaming each Device as it is joined
+#   Default output files are named after FMC, path may be changed, .gz paths are gzip compressed
+def save_inventory(records,FMC_NAME):
+    writers = []
+    FMC_NAME = re.sub(r'[^\w.-]','_',FMC_NAME)
+    for fmt,label in [('jsonl','JSON Lines'),('csv','CSV')]:
+        # Ask if output should be saved to File
+        save = input(f'Would You Like To Save {label} Output To File? [y/N]: ').lower()
+        if save in (['yes','ye','y']):
+            default = f'fmc_inventory_{FMC_NAME}.{fmt}'
+            filename = input(f'Output File, .gz to compress [{default}]: ').strip() or default
+            print(f'*\n*\nOUTPUT FILE... {filename}\n')
+            writers.append(INVENTORY_WRITERS[fmt](filename))
+        elif fmt == 'jsonl':
+            # Print JSON Lines to screen
+            writers.append(InventoryJsonlWriter('-'))
+    count = write_inventory(records,writers)
+    print(f'*\n*\nDevices written: {count}')
+
+
+#
+#
+#
+# Object Index, maps (type, name) to UUID for Network Objects in a domain
+#   Built once on first lookup, and rebuilt after TTL expires or invalidate()
+class ObjectIndex:
+    def __init__(self,client,API_UUID,ttl=OBJECT_INDEX_TTL):
+        self.client = client
+        self.API_UUID = API_UUID
+        self.ttl = ttl
+        self.index = {}
+        self.names = {}
+        self.built = None
+        self.lock = threading.Lock()
+
+    # Collect all Network Objects, and index by (type, name) and name
+    def build(self):
+        index = {}
+        names = {}
+        for objType,collection in OBJECT_TYPES.items():
+            print(f'*\n*\nINDEXING {objType} Objects...')
+            url = f'{self.client.server}/api/fmc_config/v1/domain/{self.API_UUID}/object/{collection}?offset=0&limit=1000'
+            for item in get_items(url,self.client,parallel=MAX_PARALLEL):
+                index[(objType,item['name'])] = item['id']
+                names.setdefault(item['name'],[]).append((objType,item['id']))
+        self.index = index
+        self.names = names
+        self.built = time.monotonic()
+
+    # Build Object Index if not built or expired
+    def refresh(self):
+        with self.lock:
+            if (self.built is None) or (time.monotonic() - self.built > self.ttl):
+                self.build()
+
+    # Discard Object Index, forcing rebuild on next lookup
+    def invalidate(self):
+        with self.lock:
+            self.built = None
+
+    # Return UUID for object name, optionally limited to object types
+    def lookup(self,name,objTypes=None):
+        self.refresh()
+        if objTypes:
+            for objType in objTypes:
+                if (objType,name) in self.index:
+                    return self.index[(objType,name)]
+            return None
+        if name in self.names:
+            return self.names[name][0][1]
+        return None
+
+    # Return dict of name to UUID for list of names, None if not found
+    def resolve(self,names,objTypes=None):
+        return {name:self.lookup(name,objTypes) for name in names}
+
+#
+#
+#
+# Collect objects of type matching server side nameOrValue filter, None if filter request fails
+#   FMC filter matches partial names and values, callers compare for exact match
+def filter_items(client,API_UUID,objType,value):
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/{OBJECT_TYPES[objType]}?filter=nameOrValue:{quote(value,safe="")}&expanded=true&offset=0&limit=1000'
+    json_resp = fetch_page(url,client,strict=False)
+    if 'paging' not in json_resp:
+        return None
+    items = json_resp.get('items',[])
+    paging = json_resp['paging']
+    for offset in range(paging['offset']+paging['limit'],paging.get('count',0),paging['limit']):
+        items += fetch_page(page_url(url,offset,paging['limit']),client).get('items',[])
+    return items
+
+#
+#
+#
+# Return object of type with name, None if not found
+#   Uses synced Object Store when configured, otherwise server side filter,
+#   falling back to cached Object Index when filter request fails
+def find_object(client,API_UUID,objType,name):
+    if client.store and client.store.last_sync(API_UUID,objType):
+        return client.store.find(API_UUID,objType,name)
+    items = filter_items(client,API_UUID,objType,name)
+    if items is None:
+        ObjectID = client.object_index(API_UUID).lookup(name,[objType])
+        return get_object(client,API_UUID,objType,ObjectID) if ObjectID else None
+    for item in items:
+        if item['name'] == name:
+            return item
+    return None
+
+#
+#
+#
+# Return objects of types with IP address value, compared in canonical form
+#   Uses synced Object Store when configured, otherwise server side filter,
+#   falling back to collecting whole collection when filter request fails
+def find_by_value(client,API_UUID,value,objTypes=('Host','Network','Range','FQDN')):
+    found = []
+    canonical = canonical_address(value)
+    for objType in objTypes:
+        if client.store and client.store.last_sync(API_UUID,objType):
+            found += client.store.find_by_value(API_UUID,objType,value)
+            continue
+        items = filter_items(client,API_UUID,objType,canonical or value)
+        if items is None:
+            url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/{OBJECT_TYPES[objType]}?expanded=true&offset=0&limit=1000'
+            items = iter_items(url,client,prefetch=True)
+        for item in items:
+            if (item.get('value') == value) or (canonical and canonical_address(item.get('value','')) == canonical):
+                found.append(item)
+    return found
+
+#
+#
+#
+# Return number of requests collecting whole collections of types, from paging count of a one item page
+def collection_pages(client,API_UUID,objTypes,limit=1000):
+    pages = 0
+    for objType in objTypes:
+        url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/{OBJECT_TYPES[objType]}?offset=0&limit=1'
+        count = fetch_page(url,client).get('paging',{}).get('count',0)
+        pages += max((count+limit-1)//limit,1)
+    return pages
+
+#
+# Return object of type with UUID, None if not found
+def get_object(client,API_UUID,objType,ID):
+    if client.store and client.store.last_sync(API_UUID,objType):
+        return client.store.get(API_UUID,ID)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/{OBJECT_TYPES[objType]}/{ID}'
+    return fetch_page(url,client,strict=False) or None
+
+#
+#
+#
+# Get Net Object UUID
+def get_net_object_uuid(client,API_UUID,ObjectName,outfile):
+    ObjectID = None
+    for objType in ['Network','Host']:
+        Obj = find_object(client,API_UUID,objType,ObjectName)
+        if Obj:
+            ObjectID = Obj['id']
+            break
+    if ObjectID is None:
+        print(f'Object not found --> {ObjectName}')
+        outfile.write(f'Object not found --> {ObjectName}\n')
     return ObjectID
 
 
@@ -197,335 +695,1203 @@ def select(opt,L):
 #
 #
 #
-# Collects and returns items from all pages
-def get_items(url,headers):
-    try:
-        # REST call with SSL verification turned off
-        r = requests.get(url, headers=headers, verify=False)
-        status_code = r.status_code
-        #print(json.dumps(r.json(),indent=4))
+# Return url with offset and limit query parameters replaced
+def page_url(url,offset,limit):
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query['offset'] = str(offset)
+    query['limit'] = str(limit)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+#
+#
+#
+# Raised when a page of a collection can not be collected, callers must not act on partial collections
+class PageError(requests.exceptions.RequestException):
+    pass
+
+#
+#
+#
+# Collects and returns JSON response of a single page of a collection
+#   Connection errors, timeouts, invalid JSON and 5xx are retried with backoff, other status codes are not
+#   Raises PageError when page still fails after retries, strict == False returns {} instead, for optional lookups
+#   raw == return response bytes of successful page without decoding, for decoding in another process
+def fetch_page(url,client,retries=PAGE_RETRIES,raw=False,strict=True):
+    print(f'*\n*\nCOLLECTING PAGE... {url}')
+    for attempt in range(retries+1):
+        r = None
+        status_code = None
         try:
-            temp_list = r.json()['items']
-        except:
-            return []
-        json_resp = r.json()
-        #print(f'Json: {json_resp}')
-        if status_code == 200:
-            while 'next' in json_resp['paging']:
-                url_get = json_resp['paging']['next'][0]
-                print(f'*\n*\nCOLLECTING NEXT PAGE... {url_get}')
-                try:
-                    # REST call with SSL verification turned off
-                    r = requests.get(url_get, headers=headers, verify=False)
-                    status_code = r.status_code
-                    json_resp = r.json()
-                    if status_code == 200:
-                        # Loop for First Page of Items
-                        for item in json_resp['items']:
-                            # Append Items to New Dictionary
-                            temp_list.append(item)
-                except requests.exceptions.HTTPError as err:
-                    print (f'Error in connection --> {traceback.format_exc()}')
-    except requests.exceptions.HTTPError as err:
-        print (f'Error in connection --> {traceback.format_exc()}')
+            # REST call with SSL verification turned off
+            r = client.get(url)
+            status_code = r.status_code
+            if raw and (status_code == 200):
+                return r.content
+            json_resp = r.json()
+            if status_code == 200:
+                return json_resp
+            print(f'Status code:--> {status_code}')
+            print(f'Error occurred in GET --> {json_resp}')
+        except (requests.exceptions.RequestException,ValueError) as err:
+            print(f'Error in connection --> {err}')
+        finally:
+            if r is not None: r.close()
+        if (status_code is not None) and (status_code < 500):
+            break
+        if attempt < retries:
+            delay = 2**attempt
+            print(f'Retrying page in {delay}s... {url}')
+            time.sleep(delay)
+    if not strict:
+        return {}
+    raise PageError(f'Failed to collect page, status code: {status_code} --> {url}')
+
+#
+#
+#
+# Yields items page by page, following paging next links
+#   prefetch == collect next page in background while current page is consumed
+def iter_items(url,client,prefetch=False):
+    for items in iter_pages(url,client,prefetch):
+        yield from items
+
+#
+#
+#
+# Yields list of items of each page, following paging next links
+#   prefetch == collect next page in background while current page is consumed
+def iter_pages(url,client,prefetch=False):
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        json_resp = fetch_page(url,client)
+        while json_resp:
+            next_url = None
+            if 'next' in json_resp.get('paging',{}):
+                next_url = json_resp['paging']['next'][0]
+            future = None
+            if executor and next_url:
+                future = executor.submit(fetch_page,next_url,client)
+            if json_resp.get('items'):
+                yield json_resp['items']
+            if future:
+                json_resp = future.result()
+            elif next_url:
+                json_resp = fetch_page(next_url,client)
+            else:
+                json_resp = None
+    finally:
+        if executor: executor.shutdown()
+
+#
+#
+#
+# Collects and returns items from all pages
+#   parallel == number of pages to fetch concurrently, using paging count from first page
+#   Failed pages are retried, PageError is raised rather than returning a partial collection
+def get_items(url,client,parallel=None):
+    json_resp = fetch_page(url,client)
+    temp_list = json_resp.get('items',[])
+    paging = json_resp.get('paging',{})
+    if parallel and 'next' in paging:
+        # Build remaining page urls from paging count, and fetch concurrently
+        urls = [page_url(url,i,paging['limit']) for i in range(paging['offset']+paging['limit'],paging['count'],paging['limit'])]
+        workers = min(parallel,MAX_PARALLEL,client.pool_size,len(urls))
+        print(f'*\n*\nCOLLECTING {len(urls)} PAGES WITH {workers} WORKERS...')
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # map returns pages in submission order, and raises first failed page
+            for json_page in executor.map(lambda u: fetch_page(u,client),urls):
+                temp_list.extend(json_page.get('items',[]))
+    else:
+        while 'next' in paging:
+            json_resp = fetch_page(paging['next'][0],client)
+            temp_list.extend(json_resp.get('items',[]))
+            paging = json_resp.get('paging',{})
     return temp_list
 
+#
+#
+#
+# Per-run memo, calls func once per key and returns its result to every caller
+#   Concurrent callers of a key being computed wait for the first call
+class Memo:
+    def __init__(self,func):
+        self.func = func
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def __call__(self,key):
+        with self.lock:
+            future = self.results.get(key)
+            owner = future is None
+            if owner:
+                future = self.results[key] = Future()
+        if owner:
+            try:
+                future.set_result(self.func(key))
+            except Exception as err:
+                future.set_exception(err)
+        return future.result()
+
+#
+#
+#
+# Yields func(item) for each item in item order, running func concurrently in worker pool
+#   Results completing out of order wait in the buffer of futures, at most 2 per worker are in flight
+def iter_ordered(func,items,workers=MAX_PARALLEL):
+    futures = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for item in items:
+            futures.append(executor.submit(func,item))
+            if len(futures) >= workers*2:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+#
+#
+#
+# Collects and returns items of several collections, in url order
+#   First pages of all collections, then their remaining pages, share one bounded worker pool
+#   Failed pages are retried, PageError is raised rather than returning partial collections
+def get_collections(urls,client,parallel=MAX_PARALLEL):
+    workers = min(parallel,MAX_PARALLEL,client.pool_size)
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        first_pages = list(executor.map(lambda u: fetch_page(u,client),urls))
+        pages = []
+        for url,json_resp in zip(urls,first_pages):
+            paging = json_resp.get('paging',{})
+            if 'next' in paging:
+                # Build remaining page urls from paging count, and fetch concurrently
+                urls_next = [page_url(url,i,paging['limit']) for i in range(paging['offset']+paging['limit'],paging['count'],paging['limit'])]
+                pages.append(executor.map(lambda u: fetch_page(u,client),urls_next))
+            else:
+                pages.append([])
+        for json_resp,json_pages in zip(first_pages,pages):
+            temp_list = json_resp.get('items',[])
+            # map returns pages in submission order
+            for json_page in json_pages:
+                temp_list.extend(json_page.get('items',[]))
+            results.append(temp_list)
+    return results
+
+#
+#
+#
+# Collect interfaces per device, and health alerts and deployment state, for deep Inventory
+#   Devices are collected in parallel with bounded worker pool, details are added to device records
+#   Health alerts and deployment state are joined from single collections, saving 2 requests per device
+#   Health alerts and deployment state are optional, missing or restricted on older FMC versions, and recorded as UNAVAILABLE
+def collect_device_details(client,API_UUID,DEVICELIST_DATA,workers=MAX_PARALLEL):
+    def optional_items(url):
+        try:
+            return get_items(url,client)
+        except PageError as err:
+            print(f'Optional device details unavailable --> {err}')
+            return None
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        alerts_list,pending_list = executor.map(optional_items,[
+            f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/health/alerts?expanded=true&offset=0&limit=1000',
+            f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/deployment/deployabledevices?expanded=true&offset=0&limit=1000'
+        ])
+    alerts = {}
+    for i in alerts_list or []:
+        alerts.setdefault(i.get('device',{}).get('id'),[]).append(i)
+    pending = {i['device']['id'] for i in pending_list or [] if 'device' in i}
+
+    def device_interfaces(item):
+        url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/devices/devicerecords/{item["id"]}/physicalinterfaces?expanded=true&offset=0&limit=1000'
+        return [{
+            'name': i['name'],
+            'ifname': i.get('ifname',''),
+            'enabled': i.get('enabled',False),
+            'securityZone': i.get('securityZone',{}).get('name','')
+        } for i in get_items(url,client)]
+
+    print(f'*\n*\nCOLLECTING INTERFACES FOR {len(DEVICELIST_DATA)} DEVICES...')
+    with ThreadPoolExecutor(max_workers=min(workers,MAX_PARALLEL,client.pool_size)) as executor:
+        for item,interfaces in zip(DEVICELIST_DATA,executor.map(device_interfaces,DEVICELIST_DATA)):
+            item['interfaces'] = interfaces
+            item['healthAlerts'] = alerts.get(item['id'],[]) if alerts_list is not None else 'UNAVAILABLE'
+            if pending_list is None:
+                item['deploymentStatus'] = 'UNAVAILABLE'
+            else:
+                item['deploymentStatus'] = 'PENDING' if item['id'] in pending else 'DEPLOYED'
+    return DEVICELIST_DATA
+
+
+
+
+
+
+#
+#
+#
+# Export columns after FMC_NAME, ACP_NAME, ACP_TYPE and ACP_ID, and how each is extracted from a rule
+#   (column, [(rule key, extractor)] with first key present in rule used, default)
+RULE_FIELDS = [
+    ('R_NAME',      [('name','value')], ''),
+    ('R_ID',        [('id','value')], ''),
+    ('R_ACTION',    [('action','value')], ''),
+    # Interfaces are Zones for Prefilter Rules
+    ('R_SRC_ZN',    [('sourceInterfaces','names'),('sourceZones','names')], ''),
+    ('R_DST_ZN',    [('destinationInterfaces','names'),('destinationZones','names')], ''),
+    ('R_SRC_IP',    [('sourceNetworks','networks')], ''),
+    ('R_DST_IP',    [('destinationNetworks','networks')], ''),
+    ('R_VLAN',      [('vlanTags','vlans')], ''),
+    ('R_USERS',     [('users','names')], ''),
+    # Application and URL Filters, Too complex to represent simply.
+    # Using true/false to represent if configured or not
+    ('R_APP',       [('applications','flag')], 'false'),
+    ('R_URL',       [('urls','flag')], 'false'),
+    ('R_SRC_P',     [('sourcePorts','ports')], ''),
+    # Encapsulation Ports, equivalent to Destination Ports for Prefilter
+    ('R_DST_P',     [('encapsulationPorts','list'),('destinationPorts','ports')], ''),
+    ('R_SRC_SGT',   [('sourceSecurityGroupTags','names')], ''),
+    ('R_DST_SGT',   [('destinationSecurityGroupTags','names')], ''),
+    ('R_IPS',       [('ipsPolicy','policy')], ''),
+    ('R_FILE',      [('filePolicy','policy')], '')
+]
+
+# Port literal protocols exported, others are skipped
+PORT_PROTOCOLS = {
+    '6': 'TCP',
+    '17': 'UDP'
+}
+
+#
+#
+# Rule field extractors, return string for field value
+#   Literals and object names are collected in one list, and joined once
+def extract_names(field):
+    return '; '.join([i['name'] for i in field['objects']])
+
+def extract_list(field):
+    return '; '.join(field)
+
+def extract_policy(field):
+    return field['name']
+
+def extract_flag(field):
+    return 'true'
+
+def extract_value(field):
+    return field
 
+def extract_networks(field):
+    parts = [i['value'] for i in field['literals']] if 'literals' in field else []
+    if 'objects' in field: parts += [i['name'] for i in field['objects']]
+    return '; '.join(parts)
 
+def extract_vlans(field):
+    parts = [str(i['startTag']) if i['startTag'] == i['endTag'] else f'{i["startTag"]}-{i["endTag"]}' for i in field['literals']] if 'literals' in field else []
+    if 'objects' in field: parts += [i['name'] for i in field['objects']]
+    return '; '.join(parts)
 
+def extract_ports(field):
+    parts = [f'{PORT_PROTOCOLS[i["protocol"]]}:{i["port"]}' for i in field['literals'] if i['protocol'] in PORT_PROTOCOLS] if 'literals' in field else []
+    if 'objects' in field: parts += [i['name'] for i in field['objects']]
+    return '; '.join(parts)
 
+RULE_EXTRACTORS = {
+    'value': extract_value,
+    'names': extract_names,
+    'list': extract_list,
+    'policy': extract_policy,
+    'flag': extract_flag,
+    'networks': extract_networks,
+    'vlans': extract_vlans,
+    'ports': extract_ports
+}
+
+#
+#
+# Compile field spec into default row, dict of rule key to (row index, extractor),
+# and list of (rule key, row index, extractor) for higher priority alternatives
+#   Lowest priority alternative of each field is looked up while visiting rule keys,
+#   higher priority alternatives are applied afterwards, highest priority last
+#   Row indexes follow the 4 policy columns
+def compile_rule_fields(fields):
+    defaults = [default for column,alternatives,default in fields]
+    keys = {}
+    overrides = []
+    for index,(column,alternatives,default) in enumerate(fields):
+        *higher,(key,kind) = alternatives
+        keys[key] = (index+4,RULE_EXTRACTORS[kind])
+        for key,kind in reversed(higher):
+            overrides.append((key,index+4,RULE_EXTRACTORS[kind]))
+    return defaults,keys,overrides
+
+RULE_DEFAULTS,RULE_KEYS,RULE_OVERRIDES = compile_rule_fields(RULE_FIELDS)
 
 #
 # Parse ACP Rule, return list
+#   Only keys present in rule are extracted, absent fields keep their default
 def parse_rule(FMC_NAME,rule):
-    if 'prefilterPolicy' in rule['metadata']:
-        ACP_NAME    = rule['metadata']['prefilterPolicy']['name']
-        ACP_TYPE    = rule['metadata']['prefilterPolicy']['type']
-        ACP_ID      = rule['metadata']['prefilterPolicy']['id']
-    else:
-        ACP_NAME    = rule['metadata']['accessPolicy']['name']
-        ACP_TYPE    = rule['metadata']['accessPolicy']['type']
-        ACP_ID      = rule['metadata']['accessPolicy']['id']
-    R_NAME      = rule['name']
-    R_ID        = rule['id']
-    R_ACTION    = rule['action']
-    R_SRC_ZN    = ''
-    R_DST_ZN    = ''
-    R_SRC_IP    = ''
-    R_DST_IP    = ''
-    R_VLAN      = ''
-    R_USERS     = ''
-    R_APP       = 'false'
-    R_URL       = 'false'
-    R_SRC_P     = ''
-    R_DST_P     = ''
-    R_SRC_SGT   = ''
-    R_DST_SGT   = ''
-    R_IPS       = ''
-    R_FILE      = ''
-
-    # Source Zones
-    if 'sourceZones' in rule:
-        temp_list = [i['name'] for i in rule['sourceZones']['objects']]
-        if len(temp_list) > 1:
-            R_SRC_ZN = '; '.join(temp_list)
-        else:
-            R_SRC_ZN = temp_list[0]
-    # Destination Zones
-    if 'destinationZones' in rule:
-        temp_list = [i['name'] for i in rule['destinationZones']['objects']]
-        if len(temp_list) > 1:
-            R_DST_ZN = '; '.join(temp_list)
-        else:
-            R_DST_ZN = temp_list[0]
-    # Source Zones for Prefilter Rules
-    if 'sourceInterfaces' in rule:
-        temp_list = [i['name'] for i in rule['sourceInterfaces']['objects']]
-        if len(temp_list) > 1:
-            R_SRC_ZN = '; '.join(temp_list)
-        else:
-            R_SRC_ZN = temp_list[0]
-    # Destination Zones for Prefilter Rules
-    if 'destinationInterfaces' in rule:
-        temp_list = [i['name'] for i in rule['destinationInterfaces']['objects']]
-        if len(temp_list) > 1:
-            R_DST_ZN = '; '.join(temp_list)
-        else:
-            R_DST_ZN = temp_list[0]
-    # Source Networks
-    if 'sourceNetworks' in rule:
-        lits = ''
-        objs = ''
-        if 'literals' in rule['sourceNetworks']:
-            temp_list = [i['value'] for i in rule['sourceNetworks']['literals']]
-            if len(temp_list) > 1:
-                lits = '; '.join(temp_list)
+    metadata = rule['metadata']
+    policy = metadata['prefilterPolicy'] if 'prefilterPolicy' in metadata else metadata['accessPolicy']
+    temp_list = [FMC_NAME,policy['name'],policy['type'],policy['id']] + RULE_DEFAULTS
+    for key,value in rule.items():
+        field = RULE_KEYS.get(key)
+        if field:
+            index,extract = field
+            temp_list[index] = extract(value)
+    for key,index,extract in RULE_OVERRIDES:
+        if key in rule:
+            temp_list[index] = extract(rule[key])
+    return temp_list
+
+#
+# Parse page of ACP Rules, return list of parsed rules
+def parse_rules(FMC_NAME,rules):
+    return [parse_rule(FMC_NAME,rule) for rule in rules]
+
+#
+# Decode raw JSON response of a page of ACP Rules, return (paging, list of parsed rules)
+def parse_page(FMC_NAME,content):
+    json_resp = json.loads(content)
+    return json_resp.get('paging',{}),parse_rules(FMC_NAME,json_resp.get('items',[]))
+
+#
+#
+#
+# Decodes and parses pages of ACP Rules in process pool, while collecting threads continue with next pages
+#   submit takes raw response bytes, so decoding and parsing both leave the collecting process
+#   submit returns Future of (paging, parsed page), callers keep futures in page order for ordered writing
+#   processes == 0 parses in calling thread, and returns completed Future
+#   Workers are spawned, not forked from collecting threads holding HTTP connection locks
+class RuleParser:
+    def __init__(self,FMC_NAME,processes=PARSE_PROCESSES):
+        self.FMC_NAME = FMC_NAME
+        self.executor = None
+        if processes:
+            self.executor = ProcessPoolExecutor(max_workers=processes,mp_context=multiprocessing.get_context('spawn'))
+
+    def submit(self,content):
+        if self.executor:
+            return self.executor.submit(parse_page,self.FMC_NAME,content)
+        future = Future()
+        future.set_result(parse_page(self.FMC_NAME,content))
+        return future
+
+    def close(self):
+        if self.executor: self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+#
+#
+#
+# Collect pages of ACP Rules collection as raw responses, submitted to RuleParser as they arrive
+#   Remaining page urls are built from paging count of first page, returned by its parser
+#   Returns futures of (paging, parsed page) in page order
+def submit_rule_pages(url,client,parser):
+    first = parser.submit(fetch_page(url,client,raw=True))
+    futures = [first]
+    paging = first.result()[0]
+    if 'next' in paging:
+        for offset in range(paging['offset']+paging['limit'],paging['count'],paging['limit']):
+            futures.append(parser.submit(fetch_page(page_url(url,offset,paging['limit']),client,raw=True)))
+    return futures
+
+#
+#
+#
+# Manifest of exported ACP Rules, for incremental export
+#   Saved as JSON: policy id --> name, type, metadata timestamp, and rule id --> [content hash, rule name]
+#   Policies tracked in this run replace their previous entry, policies kept carry their previous entry over
+class RuleManifest:
+    def __init__(self,path):
+        self.path = path
+        self.previous = {}
+        self.policies = {}
+        if os.path.exists(path):
+            with open(path,'r') as infile:
+                self.previous = json.load(infile)['policies']
+
+    # Content hash of parsed rule, FMC name excluded
+    @staticmethod
+    def rule_hash(temp_list):
+        return hashlib.blake2b(json.dumps(temp_list[1:]).encode(),digest_size=8).hexdigest()
+
+    # True if policy was exported before, and metadata timestamp shows no change since
+    def unchanged(self,policy_id,timestamp):
+        return (timestamp is not None) and (self.previous.get(policy_id,{}).get('timestamp') == timestamp)
+
+    # Carry previous entry of unchanged policy over
+    def keep(self,policy_id):
+        self.policies[policy_id] = self.previous[policy_id]
+
+    # Yields (status, parsed rule) for rules of policy, status is added, changed or unchanged
+    def track(self,policy_id,timestamp,rules):
+        previous = self.previous.get(policy_id,{}).get('rules',{})
+        entry = self.policies[policy_id] = {'name':'','type':'','timestamp':timestamp,'rules':{}}
+        for temp_list in rules:
+            entry['name'],entry['type'] = temp_list[1],temp_list[2]
+            digest = self.rule_hash(temp_list)
+            entry['rules'][temp_list[5]] = [digest,temp_list[4]]
+            if temp_list[5] not in previous:
+                yield 'added',temp_list
+            elif previous[temp_list[5]][0] != digest:
+                yield 'changed',temp_list
             else:
-                lits = temp_list[0]
-        if 'objects' in rule['sourceNetworks']:
-            temp_list = [i['name'] for i in rule['sourceNetworks']['objects']]
-            if len(temp_list) > 1:
-                objs = '; '.join(temp_list)
+                yield 'unchanged',temp_list
+
+    # Yields FMC_NAME,ACP_NAME,ACP_TYPE,ACP_ID,R_NAME,R_ID of previous rules missing from this run
+    def removed(self,FMC_NAME):
+        for policy_id,previous in self.previous.items():
+            current = self.policies.get(policy_id,{}).get('rules',{})
+            for rule_id,(digest,name) in previous['rules'].items():
+                if rule_id not in current:
+                    yield [FMC_NAME,previous['name'],previous['type'],policy_id,name,rule_id]
+
+    # Write manifest of this run, replacing previous file only once fully written
+    def save(self):
+        with open(f'{self.path}.tmp','w') as outfile:
+            json.dump({'policies':self.policies},outfile)
+        os.replace(f'{self.path}.tmp',self.path)
+
+# Export columns of parsed rule, and of removed rule in incremental export
+RULE_HEADER = ['FMC_NAME','ACP_NAME','ACP_TYPE','ACP_ID'] + [column for column,keys,default in RULE_FIELDS]
+REMOVED_HEADER = RULE_HEADER[:6]
+
+#
+#
+# Streaming rule writer, one CSV row per rule, values containing commas or quotes are quoted
+class RuleCsvWriter:
+    EXTENSION = 'csv'
+
+    def __init__(self,path,header=RULE_HEADER):
+        self.path = path
+        self.outfile = open_output(path)
+        self.writer = csv.writer(self.outfile,lineterminator='\n')
+        self.writer.writerow(header)
+
+    def write(self,temp_list):
+        self.writer.writerow(temp_list)
+
+    def close(self):
+        self.outfile.close()
+
+#
+#
+# Streaming rule writer, one JSON object per line per rule, keyed by column
+class RuleJsonlWriter:
+    EXTENSION = 'jsonl'
+
+    def __init__(self,path,header=RULE_HEADER):
+        self.path = path
+        self.header = header
+        self.outfile = open_output(path)
+
+    def write(self,temp_list):
+        self.outfile.write(f'{json.dumps(dict(zip(self.header,temp_list)))}\n')
+
+    def close(self):
+        self.outfile.close()
+
+#
+#
+# Streaming rule writer, SQLite table "rules" with one column per export column
+#   Rows are inserted in batches of EXPORT_BATCH, indexes on policy, action and addresses are built on close
+class RuleSqliteWriter:
+    EXTENSION = 'db'
+    INDEXES = [['ACP_NAME'],['ACP_ID'],['R_ACTION'],['R_SRC_IP'],['R_DST_IP']]
+
+    def __init__(self,path,header=RULE_HEADER):
+        self.path = path
+        self.header = header
+        self.rows = []
+        self.conn = sqlite3.connect(path)
+        # Export file is rebuilt from FMC on failure, durability is traded for load speed
+        self.conn.execute('PRAGMA journal_mode=OFF')
+        self.conn.execute('PRAGMA synchronous=OFF')
+        self.conn.execute('DROP TABLE IF EXISTS rules')
+        self.conn.execute(f'CREATE TABLE rules ({",".join(f"{column} TEXT" for column in header)})')
+        self.insert = f'INSERT INTO rules VALUES ({",".join("?" for column in header)})'
+
+    def write(self,temp_list):
+        self.rows.append(temp_list)
+        if len(self.rows) >= EXPORT_BATCH:
+            self.flush()
+
+    def flush(self):
+        self.conn.executemany(self.insert,self.rows)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        for columns in self.INDEXES:
+            if set(columns) <= set(self.header):
+                self.conn.execute(f'CREATE INDEX rules_{"_".join(columns).lower()} ON rules ({",".join(columns)})')
+        self.conn.commit()
+        self.conn.close()
+
+# Rule export formats, and their writer
+RULE_WRITERS = {
+    'csv': RuleCsvWriter,
+    'jsonl': RuleJsonlWriter,
+    'sqlite': RuleSqliteWriter
+}
+
+#
+#
+# Ask for rule export format, return its writer class
+def select_rule_writer():
+    Test = False
+    while not Test:
+        choice = input(f'Please Select Export Format, {", ".join(RULE_WRITERS)} [csv]: ').lower().strip() or 'csv'
+        if choice in RULE_WRITERS:
+            Test = True
+        else:
+            print('Invalid Selection...\n')
+    return RULE_WRITERS[choice]
+
+#
+#
+#
+# ACP rule export of a domain, shared by threaded and asyncio export tools
+#   Asks for export options, and writes parsed rules of policies in policy order to selected writer
+#   Full export writes every rule to one file, incremental export writes added, changed and removed rules to own files
+#   Manifest of exported rules is kept per domain, and saved only after complete export
+class RuleExport:
+    def __init__(self,FMC_NAME,API_UUID,acp_list,prefilter_stamps):
+        self.FMC_NAME = FMC_NAME
+        self.acp_list = acp_list
+        self.prefilter_stamps = prefilter_stamps
+        domain_name = re.sub(r'[^\w.-]','_',FMC_NAME)
+        self.manifest = RuleManifest(f'acp_rule_manifest_{domain_name}_{API_UUID}.json')
+        self.counts = {'added':0,'changed':0,'unchanged':0,'removed':0}
+
+    # Ask for export options, and open output files
+    def ask(self):
+        # Ask if only rules changed since last export should be written
+        self.incremental = False
+        Test = False
+        while not Test:
+            choice = input('Would You Like To Export Only Rules Changed Since Last Export? [y/N]: ').lower()
+            if choice in (['yes','ye','y']):
+                self.incremental = True
+                Test = True
+            elif choice in (['no','n','']):
+                Test = True
             else:
-                objs = temp_list[0]
-        if (lits != '') and (objs != ''):
-            R_SRC_IP = '; '.join([lits,objs])
-        elif lits != '':
-            R_SRC_IP = lits
-        elif objs != '':
-            R_SRC_IP = objs
-    # Destination Networks
-    if 'destinationNetworks' in rule:
-        lits = ''
-        objs = ''
-        if 'literals' in rule['destinationNetworks']:
-            temp_list = [i['value'] for i in rule['destinationNetworks']['literals']]
-            if len(temp_list) > 1:
-                lits = '; '.join(temp_list)
+                print('Invalid Selection...\n')
+        if self.incremental and not self.manifest.previous:
+            print(f'*\n*\nNO PREVIOUS EXPORT FOUND IN {self.manifest.path}, EXPORTING ALL RULES...')
+            self.incremental = False
+
+        # Ask if Prefilter rules shared by several policies should be written once
+        #   Incremental export writes changes of each Prefilter Policy once
+        self.shared_once = self.incremental
+        Test = self.incremental
+        while not Test:
+            choice = input('Would You Like To Write Shared Prefilter Rules Only Once? [y/N]: ').lower()
+            if choice in (['yes','ye','y']):
+                self.shared_once = True
+                Test = True
+            elif choice in (['no','n','']):
+                Test = True
             else:
-                lits = temp_list[0]
-        if 'objects' in rule['destinationNetworks']:
-            temp_list = [i['name'] for i in rule['destinationNetworks']['objects']]
-            if len(temp_list) > 1:
-                objs = '; '.join(temp_list)
+                print('Invalid Selection...\n')
+
+        # Ask for number of rule parsing processes
+        Test = False
+        while not Test:
+            choice = input(f'Please Enter Number Of Rule Parsing Processes, 0 To Parse In Collecting Threads [{PARSE_PROCESSES}]: ').strip()
+            if choice == '':
+                self.processes = PARSE_PROCESSES
+                Test = True
+            elif choice.isdigit():
+                self.processes = int(choice)
+                Test = True
             else:
-                objs = temp_list[0]
-        if (lits != '') and (objs != ''):
-            R_DST_IP = '; '.join([lits,objs])
-        elif lits != '':
-            R_DST_IP = lits
-        elif objs != '':
-            R_DST_IP = objs
-    # VLAN Tags
-    if 'vlanTags' in rule:
-        lits = ''
-        objs = ''
-        if 'literals' in rule['vlanTags']:
-            temp_list = []
-            for i in rule['vlanTags']['literals']:
-                if i['startTag'] == i['endTag']:
-                    temp_list.append(str(i['startTag']))
+                print('Invalid Selection...\n')
+
+        writer = select_rule_writer()
+        filename = f'acp_rule_export_{datetime.now().strftime("%Y-%m-%d_%H%M")}'
+        if self.incremental:
+            self.outfiles = {status:writer(f'{filename}_{status}.{writer.EXTENSION}') for status in ['added','changed']}
+            self.outfiles['removed'] = writer(f'{filename}_removed.{writer.EXTENSION}',REMOVED_HEADER)
+        else:
+            outfile = writer(f'{filename}.{writer.EXTENSION}')
+            self.outfiles = {status:outfile for status in ['added','changed','unchanged']}
+        print(f'*\n*\nOUTPUT FILES... {", ".join(sorted(set(outfile.path for outfile in self.outfiles.values())))}')
+
+    # True if rules of Access Policy need not be collected, unchanged since last export
+    def skip_policy(self,acp):
+        return self.incremental and self.manifest.unchanged(acp['id'],acp.get('metadata',{}).get('timestamp'))
+
+    # True if rules of Prefilter Policy need not be collected, unchanged since last export
+    def skip_prefilter(self,prefilter_id):
+        return self.incremental and self.manifest.unchanged(prefilter_id,self.prefilter_stamps.get(prefilter_id))
+
+    # Write parsed rules of policies, in policy and page order
+    #   policies yields (pages, prefilter_id, prefilter pages) per policy of acp_list in order
+    #   pages are futures of parsed pages, None for policy unchanged since last export
+    def write(self,policies):
+        start = time.time()
+        count = 0
+        written = set()
+        for index,(pages,prefilter_id,prefilter) in enumerate(policies):
+            acp = self.acp_list[index]
+            tracked_policies = [(acp['id'],acp.get('metadata',{}).get('timestamp'),pages)]
+            if (not self.shared_once) or (prefilter_id not in written):
+                tracked_policies.append((prefilter_id,self.prefilter_stamps.get(prefilter_id),prefilter))
+                written.add(prefilter_id)
+            rule_count = 0
+            for policy_id,timestamp,pages in tracked_policies:
+                if pages is None:
+                    # Unchanged since last export
+                    self.manifest.keep(policy_id)
+                    continue
+                rules = (temp_list for future in pages for temp_list in future.result()[1])
+                if policy_id in self.manifest.policies:
+                    # Shared Prefilter rules written again after this policy
+                    tracked = (('unchanged',temp_list) for temp_list in rules)
                 else:
-                    temp_list.append(f'{i["startTag"]}-{i["endTag"]}')
-            if len(temp_list) > 1:
-                lits = '; '.join(temp_list)
-            else:
-                lits = temp_list[0]
-        if 'objects' in rule['vlanTags']:
-            temp_list = [i['name'] for i in rule['vlanTags']['objects']]
-            if len(temp_list) > 1:
-                objs = '; '.join(temp_list)
-            else:
-                objs = temp_list[0]
-        if (lits != '') and (objs != ''):
-            R_VLAN = '; '.join([lits,objs])
-        elif lits != '':
-            R_VLAN = lits
-        elif objs != '':
-            R_VLAN = objs
-    # Users
-    if 'users' in rule:
-        temp_list = [i['name'] for i in rule['users']['objects']]
-        if len(temp_list) > 1:
-            R_USERS = '; '.join(temp_list)
+                    tracked = self.manifest.track(policy_id,timestamp,rules)
+                for status,temp_list in tracked:
+                    if status in self.outfiles:
+                        self.outfiles[status].write(temp_list)
+                    self.counts[status] += 1
+                    rule_count += 1
+            count += rule_count
+            elapsed = max(time.time()-start,0.001)
+            print(f'Policy {index+1}/{len(self.acp_list)} written: {acp["name"]}, {rule_count} rules, {count} total, {count/elapsed:.1f} rules/s')
+
+    # Write removed rules of incremental export, close output files, and save manifest
+    def close(self):
+        if self.incremental:
+            for temp_list in self.manifest.removed(self.FMC_NAME):
+                self.outfiles['removed'].write(temp_list)
+                self.counts['removed'] += 1
+            print(f'*\n*\nRules added: {self.counts["added"]}, changed: {self.counts["changed"]}, removed: {self.counts["removed"]}, unchanged: {self.counts["unchanged"]}')
+        for outfile in set(self.outfiles.values()):
+            outfile.close()
+        # Save manifest only after complete export
+        self.manifest.save()
+        print(f'*\n*\nMANIFEST SAVED... {self.manifest.path}')
+
+#
+#
+#
+# Yields lists of at most size items from iterable
+def iter_chunks(iterable,size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+#
+#
+#
+# POST single bulk chunk, return (status_code, created items, error)
+def post_bulk_chunk(client,url,chunk):
+    r = None
+    try:
+        # REST call with SSL verification turned off:
+        r = client.post(url, data=json.dumps(chunk))
+        status_code = r.status_code
+        if status_code == 201 or status_code == 202:
+            return status_code,r.json().get('items',[]),None
+        return status_code,[],r.text
+    except (requests.exceptions.RequestException,ValueError) as err:
+        return None,[],traceback.format_exc()
+    finally:
+        if r is not None: r.close()
+
+#
+#
+#
+# Return objects of bulk POST chunk which already exist, looked up by name with server side nameOrValue filter
+#   Names sharing a common prefix are looked up with one filtered query, otherwise with one query per name
+#   Raises PageError when lookup fails
+def find_bulk_chunk(client,url,chunk):
+    collection = urlunsplit(urlsplit(url)._replace(query=''))
+    names = {item['name'] for item in chunk}
+    prefix = os.path.commonprefix(list(names))
+    found = {}
+    for value in ([prefix] if len(prefix) >= 3 else sorted(names)):
+        lookup = f'{collection}?filter=nameOrValue:{quote(value,safe="")}&expanded=true&offset=0&limit=1000'
+        for item in iter_items(lookup,client):
+            if item['name'] in names:
+                found[item['name']] = item
+    return list(found.values())
+
+#
+#
+#
+# Retry bulk POST chunk which failed with timeout or 5xx, return (status_code, created items, error)
+#   Chunk may have been created partially or completely, only objects not found by name are POSTed again
+#   Chunk is not POSTed again when lookup fails, to avoid creating duplicate objects
+def retry_bulk_chunk(client,url,chunk):
+    try:
+        existing = find_bulk_chunk(client,url,chunk)
+    except requests.exceptions.RequestException as err:
+        return None,[],traceback.format_exc()
+    names = {item['name'] for item in existing}
+    missing = [item for item in chunk if item['name'] not in names]
+    print(f'{len(existing)} of {len(chunk)} chunk items already exist, POSTING {len(missing)} missing items...')
+    if not missing:
+        return 201,existing,None
+    status_code,items,error = post_bulk_chunk(client,url,missing)
+    return status_code,existing+items,error
+
+#
+#
+#
+# POST chunks concurrently, return list of per-chunk results in chunk order
+#   chunks may be a generator, at most 2 chunks per worker are held in memory
+#   Chunks failing with connection errors or 5xx are retried with their missing objects only, 4xx are reported
+def post_bulk_chunks(client,url,chunks,workers=MAX_PARALLEL,retries=2):
+    results = {}
+    failed = []
+
+    def handle(future,index,chunk):
+        status_code,items,error = future.result()
+        attempts = results[index]['attempts']+1 if index in results else 1
+        results[index] = {
+            'chunk': index,
+            'count': len(chunk),
+            'status': status_code,
+            'items': items,
+            'error': error,
+            'attempts': attempts
+        }
+        if error:
+            print(f'Chunk {index} of {len(chunk)} items failed, status code:--> {status_code}')
+            if (status_code is None) or (status_code >= 500):
+                failed.append((index,chunk))
         else:
-            R_USERS = temp_list[0]
-    # Application Filters, Too complext to represent simply.
-    # Using true/false to represent if configured or not
-    if 'applications' in rule:
-        R_APP = 'true'
-    # URL Reputation Filters, Too complext to represent simply.
-    # Using true/false to represent if configured or not
-    if 'urls' in rule:
-        R_URL = 'true'
-    # Source Ports
-    if 'sourcePorts' in rule:
-        lits = ''
-        objs = ''
-        if 'literals' in rule['sourcePorts']:
-            temp_list = []
-            for i in rule['sourcePorts']['literals']:
-                if i['protocol'] == '6':
-                    temp_list.append(f'TCP:{i["port"]}')
-                elif i['protocol'] == '17':
-                    temp_list.append(f'UDP:{i["port"]}')
-            if len(temp_list) > 1:
-                lits = '; '.join(temp_list)
-            else:
-                lits = temp_list[0]
-        if 'objects' in rule['sourcePorts']:
-            temp_list = [i['name'] for i in rule['sourcePorts']['objects']]
-            if len(temp_list) > 1:
-                objs = '; '.join(temp_list)
-            else:
-                objs = temp_list[0]
-        if (lits != '') and (objs != ''):
-            R_SRC_P = '; '.join([lits,objs])
-        elif lits != '':
-            R_SRC_P = lits
-        elif objs != '':
-            R_SRC_P = objs
-    # Destination Ports
-    if 'destinationPorts' in rule:
-        lits = ''
-        objs = ''
-        if 'literals' in rule['destinationPorts']:
-            temp_list = []
-            for i in rule['destinationPorts']['literals']:
-                if i['protocol'] == '6':
-                    temp_list.append(f'TCP:{i["port"]}')
-                elif i['protocol'] == '17':
-                    temp_list.append(f'UDP:{i["port"]}')
-            if len(temp_list) > 1:
-                lits = '; '.join(temp_list)
+            print(f'Chunk {index} of {len(chunk)} items successfully created...')
+
+    def run(chunks,post):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            for index,chunk in chunks:
+                pending[executor.submit(post,client,url,chunk)] = (index,chunk)
+                if len(pending) >= workers*2:
+                    done,_ = wait(pending,return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle(future,*pending.pop(future))
+            for future in list(pending):
+                future.result()
+                handle(future,*pending.pop(future))
+
+    run(enumerate(chunks),post_bulk_chunk)
+    for attempt in range(retries):
+        if not failed:
+            break
+        retry = failed[:]
+        del failed[:]
+        print(f'*\n*\nRETRYING {len(retry)} FAILED CHUNKS...')
+        run(retry,retry_bulk_chunk)
+    return [results[i] for i in sorted(results)]
+
+#
+#
+#
+# Sort groups into dependency levels, nested groups in levels before groups nesting them
+#   groups == dict of group name to list of nested group names
+#   Returns (levels, missing references, groups in or depending on a cycle)
+def group_levels(groups):
+    missing = [f'{name} -> {dep}' for name,deps in groups.items() for dep in deps if dep not in groups]
+    remaining = {name:{dep for dep in deps if dep in groups} for name,deps in groups.items()}
+    dependents = {name:[] for name in groups}
+    for name,deps in remaining.items():
+        for dep in deps:
+            dependents[dep].append(name)
+    levels = []
+    ready = [name for name,deps in remaining.items() if not deps]
+    while ready:
+        levels.append(ready)
+        next_ready = []
+        for dep in ready:
+            for name in dependents[dep]:
+                remaining[name].discard(dep)
+                if not remaining[name]:
+                    next_ready.append(name)
+        ready = next_ready
+    placed = {name for level in levels for name in level}
+    cyclic = [f'{name} -> {", ".join(sorted(remaining[name]))}' for name in groups if name not in placed]
+    return levels,missing,cyclic
+
+#
+#
+#
+# Build Network Group from ASA group entries, resolving names from dicts of name to {'type','id'}
+#   Returns (Obj, list of unresolved references), Obj with unresolved references is incomplete and must not be posted
+def build_network_group(objName,entries,objects,groups):
+    Obj = {
+        'name': objName,
+        'type': 'NetworkGroup',
+        'objects': [],
+        'literals': []
+    }
+    unresolved = []
+    for item in entries:
+        fields = item.split()
+        if len(fields) < 2:
+            continue
+        if fields[0] == 'network-object':
+            if fields[1] == 'host':
+                Obj['literals'].append({
+                    'type': 'Host',
+                    'value': fields[-1]
+                })
+            elif fields[1] == 'object':
+                if fields[-1] in objects:
+                    Obj['objects'].append(dict(objects[fields[-1]]))
+                else:
+                    unresolved.append(f'{objName} -> {fields[-1]}')
+            elif len(fields) == 2:
+                # IPv6 prefix
+                Obj['literals'].append({
+                    'type': 'Network',
+                    'value': fields[1]
+                })
             else:
-                lits = temp_list[0]
-        if 'objects' in rule['destinationPorts']:
-            temp_list = [i['name'] for i in rule['destinationPorts']['objects']]
-            if len(temp_list) > 1:
-                objs = '; '.join(temp_list)
+                Obj['literals'].append({
+                    'type': 'Network',
+                    'value': f'{fields[-2]}/{fields[-1]}'
+                })
+        elif fields[0] == 'group-object':
+            if fields[-1] in groups:
+                Obj['objects'].append(dict(groups[fields[-1]]))
             else:
-                objs = temp_list[0]
-        if (lits != '') and (objs != ''):
-            R_DST_P = '; '.join([lits,objs])
-        elif lits != '':
-            R_DST_P = lits
-        elif objs != '':
-            R_DST_P = objs
-    # Encapsulation Ports, equivalent to Destination Ports for Prefilter
-    if 'encapsulationPorts' in rule:
-        if len(rule['encapsulationPorts']) > 1:
-            R_DST_P = '; '.join(rule['encapsulationPorts'])
+                unresolved.append(f'{objName} -> {fields[-1]}')
+    return Obj,unresolved
+
+#
+#
+#
+# Return canonical form of IPv4/IPv6 host or network, None if invalid
+#   Networks use CIDR notation, so 10.0.0.0/255.0.0.0 == 10.0.0.0/8
+def canonical_address(value):
+    try:
+        if '/' in value:
+            return ipaddress.ip_network(value).with_prefixlen
+        return ipaddress.ip_address(value).compressed
+    except ValueError:
+        return None
+
+#
+#
+#
+# Index Host and Network objects once for group diffs
+#   Returns (objIndex, values), objIndex == dict of canonical address to first object with it
+#   values == dict of object id to canonical address
+def index_network_objects(objects):
+    objIndex = {}
+    values = {}
+    for item in objects:
+        value = canonical_address(item.get('value',''))
+        if value is None:
+            continue
+        values[item['id']] = value
+        if value not in objIndex:
+            objIndex[value] = {'type':item['type'],'name':item['name'],'id':item['id']}
+    return objIndex,values
+
+#
+#
+#
+# Diff Network Group against file entries, using indexes from index_network_objects
+#   Existing literals and objects are kept for entries in file, other entries use
+#   first object with the same address, or are returned in 'create'
+#   Returns dict of:
+#     missing/extra == canonical entries added to/removed from group
+#     literals/objects == new group literals and object references
+#     create == canonical entries without object, invalid == file entries not IPv4/IPv6
+#     unsupported == group objects which are not Host or Network objects, dropped from group
+def diff_network_group(objGroup,fileEntries,objIndex,values):
+    fileSet = {}
+    invalid = []
+    for ip in fileEntries:
+        ip = ip.strip()
+        if not ip:
+            continue
+        value = canonical_address(ip)
+        if value is None:
+            invalid.append(ip)
         else:
-            R_DST_P = rule['encapsulationPorts'][0]
-    # Source SGTs
-    if 'sourceSecurityGroupTags' in rule:
-        temp_list = [i['name'] for i in rule['sourceSecurityGroupTags']['objects']]
-        if len(temp_list) > 1:
-            R_SRC_SGT = '; '.join(temp_list)
+            fileSet.setdefault(value,ip)
+
+    current = {}
+    unsupported = []
+    for lit in objGroup.get('literals',[]):
+        value = canonical_address(lit['value'])
+        if value is not None:
+            current.setdefault(value,('literal',lit))
+    for obj in objGroup.get('objects',[]):
+        value = values.get(obj['id'])
+        if value is None:
+            unsupported.append(obj.get('name',obj['id']))
         else:
-            R_SRC_SGT = temp_list[0]
-    # Destination SGTs
-    if 'destinationSecurityGroupTags' in rule:
-        temp_list = [i['name'] for i in rule['destinationSecurityGroupTags']['objects']]
-        if len(temp_list) > 1:
-            R_DST_SGT = '; '.join(temp_list)
+            current.setdefault(value,('object',{'type':obj['type'],'name':obj.get('name'),'id':obj['id']}))
+
+    diff = {
+        'missing': [value for value in fileSet if value not in current],
+        'extra': [value for value in current if value not in fileSet],
+        'literals': [],
+        'objects': [],
+        'create': [],
+        'invalid': invalid,
+        'unsupported': unsupported
+    }
+    for value in fileSet:
+        if value in current:
+            kind,item = current[value]
+            diff['literals' if kind == 'literal' else 'objects'].append(item)
+        elif value in objIndex:
+            diff['objects'].append(objIndex[value])
         else:
-            R_DST_SGT = temp_list[0]
-    # IPS Policy
-    if 'ipsPolicy' in rule:
-        R_IPS = rule['ipsPolicy']['name']
-    # File Policy
-    if 'filePolicy' in rule:
-        R_FILE = rule['filePolicy']['name']
-
-    temp_list = [
-        FMC_NAME,
-        ACP_NAME,
-        ACP_TYPE,
-        ACP_ID,
-        R_NAME,
-        R_ID,
-        R_ACTION,
-        R_SRC_ZN,
-        R_DST_ZN,
-        R_SRC_IP,
-        R_DST_IP,
-        R_VLAN,
-        R_USERS,
-        R_APP,
-        R_URL,
-        R_SRC_P,
-        R_DST_P,
-        R_SRC_SGT,
-        R_DST_SGT,
-        R_IPS,
-        R_FILE,
-    ]
-    return temp_list
+            diff['create'].append(value)
+    return diff
 
-def put_bulk_acp_rules(server,headers,username,password,API_UUID,acp_id,put_data):
+#
+#
+#
+# Create Host and Network objects for canonical addresses in concurrent bulk chunks
+#   Returns dict of canonical address to created object {'type','name','id'}
+def create_network_objects(client,API_UUID,values):
+    createObjs = {'Network': [], 'Host': []}
+    for ip in values:
+        if '/' in ip:
+            createObjs['Network'].append({
+                'name': f'Net-{ip.replace("/","-")}',
+                'type': 'Network',
+                'description': '',
+                'value': ip
+            })
+        else:
+            createObjs['Host'].append({
+                'name': f'Host-{ip}',
+                'type': 'Host',
+                'description': '',
+                'value': ip
+            })
+    created = {}
+    for objType,collection in [('Network','networks'),('Host','hosts')]:
+        if createObjs[objType] == []:
+            continue
+        print(f'*\n*\nCREATING {len(createObjs[objType])} {objType} OBJECTS...')
+        url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/{collection}?bulk=true'
+        for result in post_bulk_chunks(client,url,iter_chunks(createObjs[objType],BULK_LIMIT)):
+            for i in result['items']:
+                created[canonical_address(i['value'])] = {'type':i['type'],'name':i['name'],'id':i['id']}
+    return created
+
+#
+#
+#
+# PUT Network Group with new objects and literals, return (status_code, error)
+def put_network_group(client,API_UUID,objGroup):
+    r = None
+    post_data = {k:v for k,v in objGroup.items() if k not in ('links','metadata')}
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/networkgroups/{objGroup["id"]}'
     try:
-        url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies/{acp_id}/accessrules?bulk=true'
-        print(f'Performing API PUT to: {url}')
         # REST call with SSL verification turned off:
-        r = requests.put(url, json=put_data, headers=headers, verify=False)
-        status_code = r.status_code
-        json_resp = r.json()
-        if status_code == 200:
-            print(f'Access Rules successfully updated')
-        else:
-            print(f'Status code:--> {status_code}')
-            print(f'Error occurred in PUT --> {json_resp}')
-            r.raise_for_status()
-    except requests.exceptions.HTTPError:
-        err_resp = r.json()
-        for item in err_resp['error']['messages']:
-            # Error Handling for Access Token Timeout
-            if 'Access token invalid' in item['description']:
-                print ('Access token invalid... Attempting to Renew Token...')
-                results=access_token(server,headers,username,password)
-                headers['X-auth-access-token']=results[0]
-                try:
-
-                    # REST call with SSL verification turned off:
-                    r = requests.put(url, json=put_data, headers=headers, verify=False)
-                    print(f'Performing API PUT to: {url}')
-                    status_code = r.status_code
-                    json_resp = r.json()
-                    if (status_code == 200):
-                        print(f'Access Rules successfully updated')
-                    else:
-                        print(f'Status code:--> {status_code}')
-                        print(f'Error occurred in PUT --> {json.dumps(json_resp,indent=4)}')
-                        r.raise_for_status()
-
-
-                except requests.exceptions.HTTPError:
-                    print (f'Error in connection --> {traceback.format_exc()}')
+        r = client.put(url, data=json.dumps(post_data))
+        if r.status_code == 200:
+            return r.status_code,None
+        return r.status_code,r.text
+    except requests.exceptions.RequestException as err:
+        return None,traceback.format_exc()
+    finally:
+        if r is not None: r.close()
 
+#
+#
+#
+# PUT Network Groups concurrently, return dict of group name to (status_code, error)
+def put_network_groups(client,API_UUID,objGroups,workers=MAX_PARALLEL):
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(put_network_group,client,API_UUID,objGroup):objGroup['name'] for objGroup in objGroups}
+        for future in futures:
+            results[futures[future]] = future.result()
+            status_code,error = results[futures[future]]
+            if error:
+                print(f'Network Object Group "{futures[future]}" failed, status code:--> {status_code}')
             else:
-                print (f'Error in connection --> {traceback.format_exc()}')
-    # End
+                print(f'Network Object Group "{futures[future]}" successfully updated...')
+    return results
+
+#
+#
+#
+# Load group name to file mappings from directory or manifest file
+#   Directory: every .txt file, named after its group
+#   Manifest: CSV lines of group name,file path, paths relative to manifest
+def load_group_manifest(path):
+    groups = {}
+    if os.path.isdir(path):
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith('.txt'):
+                groups[filename[:-4]] = os.path.join(path,filename)
+    else:
+        with open(path,'r') as infile:
+            for row in csv.reader(infile):
+                if (len(row) < 2) or row[0].startswith('#'):
+                    continue
+                groups[row[0].strip()] = os.path.join(os.path.dirname(path),row[1].strip())
+    return groups
+
+#
+# Apply IPS/File Policy to Access Rules, and delete items unprocessable by PUT
+def update_rule_policies(acp_rules,ips,vset,filepolicy,all_rules):
+    # For Loop to update all rules
+    for item in acp_rules:
+        if (ips) and ((all_rules) or ('ipsPolicy' in item)):
+            # Create IPS Policy
+            item ['ipsPolicy'] = {}
+            # Assign Values
+            item ['ipsPolicy']['id'] = ips['id']
+            item ['ipsPolicy']['name'] = ips['name']
+            item ['ipsPolicy']['type'] = 'IntrusionPolicy'
+            # Create VariableSet
+            item ['variableSet'] = {}
+            # Assign Values
+            item ['variableSet']['id'] = vset['id']
+            item ['variableSet']['name'] = vset['name']
+            item ['variableSet']['type'] = 'VariableSet'
+        if (filepolicy) and ((all_rules) or ('filePolicy' in item)):
+            # Create FilePolicy
+            item ['filePolicy'] = {}
+            # Assign Values
+            item ['filePolicy']['id'] = filepolicy['id']
+            item ['filePolicy']['name'] = filepolicy['name']
+            item ['filePolicy']['type'] = 'FilePolicy'
+
+        # Delete Unprocessable items
+        del item['links']
+        del item['metadata']
+        if 'commentHistoryList' in item:
+            del item['commentHistoryList']
+        if ('logFiles' in item) and ('filePolicy' not in item):
+            del item['logFiles']
+
+
+#
+#
+#
+# PUT single bulk chunk, return (status_code, error, seconds)
+def put_bulk_chunk(client,url,chunk):
+    r = None
+    start = time.time()
+    try:
+        # REST call with SSL verification turned off:
+        r = client.put(url, data=json.dumps(chunk))
+        status_code = r.status_code
+        if status_code == 200:
+            return status_code,None,time.time()-start
+        return status_code,r.text,time.time()-start
+    except requests.exceptions.RequestException as err:
+        return None,traceback.format_exc(),time.time()-start
     finally:
-        if r: r.close()
+        if r is not None: r.close()
+
+#
+#
+#
+# Adaptive chunk plan for bulk PUT of count items, shared by threaded and asyncio bulk PUT
+#   Chunks are taken from items by position, no copies of remaining items are made
+#   Chunks failing with connection errors, timeouts, 413 or 5xx halve the chunk size, and are split and retried
+#   Chunks completing within BULK_FAST seconds double the chunk size, up to BULK_LIMIT or below size rejected with 413
+#   results are in completion order, failed chunks split and sent again are marked retried
+class BulkPlan:
+    def __init__(self,count,retries=2,size=BULK_START):
+        self.count = count
+        self.retries = retries
+        self.size = size
+        self.limit = BULK_LIMIT
+        self.position = 0
+        self.retry = deque()
+        self.results = []
+
+    # True while chunks remain to be sent
+    def remaining(self):
+        return bool(self.retry) or (self.position < self.count)
+
+    # Return (first, last, attempts) of next chunk, retried chunks first
+    def next_chunk(self):
+        if self.retry:
+            return self.retry.popleft()
+        first = self.position
+        self.position = min(first+self.size,self.count)
+        return first,self.position,0
+
+    # Record outcome of chunk, adapt chunk size, and queue failed chunk for retry
+    def done(self,first,last,attempts,status_code,error,seconds):
+        result = {
+            'chunk': len(self.results),
+            'first': first,
+            'count': last-first,
+            'status': status_code,
+            'error': error,
+            'attempts': attempts+1,
+            'seconds': seconds,
+            'retried': False
+        }
+        self.results.append(result)
+        if not error:
+            # Grow only on chunks sent at current size, not on earlier smaller chunks completing late
+            if (seconds < BULK_FAST) and (last-first >= self.size):
+                self.size = min(self.size*2,self.limit)
+            print(f'Chunk {result["chunk"]}, items {first}-{last-1}, successfully updated in {seconds:.1f}s, chunk size {self.size}')
+            return result
+        print(f'Chunk {result["chunk"]}, items {first}-{last-1}, failed in {seconds:.1f}s, status code:--> {status_code}')
+        if (status_code is None) or (status_code == 413) or (status_code >= 500):
+            # Halve failed chunk size, concurrent failures of same size shrink only once
+            self.size = max(min(self.size,(last-first)//2),BULK_MIN)
+            if status_code == 413:
+                # Request too large, chunk size no longer grows to failed size
+                self.limit = self.size
+            if attempts < self.retries:
+                print(f'Retrying items {first}-{last-1} with chunk size {self.size}...')
+                result['retried'] = True
+                # Split in even parts of at most chunk size
+                parts = -(-(last-first)//self.size)
+                step = -(-(last-first)//parts)
+                for index in range(first,last,step):
+                    self.retry.append((index,min(index+step,last),attempts+1))
+        return result
+
+#
+#
+#
+# PUT items in chunks concurrently, adapting chunk size to FMC response with BulkPlan, return list of per-chunk results
+def put_bulk_chunks(client,url,items,workers=MAX_PARALLEL,retries=2,size=BULK_START):
+    plan = BulkPlan(len(items),retries,size)
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or plan.remaining():
+            # Keep every worker busy
+            while (len(pending) < workers) and plan.remaining():
+                first,last,attempts = plan.next_chunk()
+                pending[executor.submit(put_bulk_chunk,client,url,items[first:last])] = (first,last,attempts)
+            done,_ = wait(pending,return_when=FIRST_COMPLETED)
+            for future in done:
+                plan.done(*pending.pop(future),*future.result())
+    return plan.results
+
+#
+#
+#
+# PUT Access Rules of policy in adaptive concurrent bulk chunks, return list of per-chunk results
+def put_bulk_acp_rules(client,API_UUID,acp_id,acp_rules,workers=MAX_PARALLEL):
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies/{acp_id}/accessrules?bulk=true'
+    print(f'Performing API PUT to: {url}')
+    return put_bulk_chunks(client,url,acp_rules,workers)
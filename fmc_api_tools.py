@@ -4,27 +4,63 @@ import os,\
         sys,\
         csv,\
         json,\
+        time,\
         socket,\
         random,\
         netaddr,\
         netmiko,\
         getpass,\
+        asyncio,\
+        itertools,\
         requests,\
         warnings,\
         traceback
 from datetime import datetime
-from ipaddress import IPv4Network
 
 # Import custom modules from file
 from fmc_api_module import \
         define_password,\
-        access_token,\
-        get_device_details,\
+        FmcClient,\
+        get_device_record,\
+        iter_inventory,\
+        save_inventory,\
         get_net_object_uuid, \
         select,\
         get_items,\
-        parse_rule,\
+        PageError,\
+        get_collections,\
+        collect_device_details,\
+        iter_ordered,\
+        Memo,\
+        MAX_PARALLEL,\
+        BULK_LIMIT,\
+        iter_chunks,\
+        post_bulk_chunks,\
+        group_levels,\
+        build_network_group,\
+        index_network_objects,\
+        diff_network_group,\
+        create_network_objects,\
+        put_network_group,\
+        put_network_groups,\
+        load_group_manifest,\
+        find_object,\
+        find_by_value,\
+        get_object,\
+        FIND_LIMIT,\
+        collection_pages,\
+        canonical_address,\
+        RuleParser,\
+        submit_rule_pages,\
+        RuleExport,\
+        update_rule_policies,\
         put_bulk_acp_rules
+import fmc_api_async
+from fmc_object_store import \
+        ObjectStore,\
+        get_collection
+from fmc_asa_parser import \
+        load_network_objects
 
 # Disable SSL warning
 warnings.filterwarnings('ignore', message='Unverified HTTPS request')
@@ -33,7 +69,7 @@ warnings.filterwarnings('ignore', message='Unverified HTTPS request')
 #
 #
 # Define Blank URL Get Script as Function
-def blank_get(server,headers,username,password):
+def blank_get(client):
     print ('''
 ***********************************************************************************************
 *                             Basic URL GET Script                                            *
@@ -53,11 +89,6 @@ def blank_get(server,headers,username,password):
 ***********************************************************************************************
 ''')
 
-    print('Generating Access Token')
-    # Generate Access Token and pull domains from auth headers
-    results=access_token(server,headers,username,password)
-    headers['X-auth-access-token']=results[0]
-
     # Request API URI Path
     api_path = input('Please Enter URI: ').lower().strip()
 
@@ -69,7 +100,7 @@ def blank_get(server,headers,username,password):
     getbyid = re.match('[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', api_path[-36:])
 
     # Set URL
-    url = f'{server}{api_path}'
+    url = f'{client.server}{api_path}'
 
     # Ask to Expand and/or assign output Limit
     if getbyid == None:
@@ -77,19 +108,21 @@ def blank_get(server,headers,username,password):
         limit = input('Would You Like To Limit Output Entries? [Number or "No"]: ').lower()
 
         if limit not in (['no','n','']) and expand in (['yes','ye','y']):
-            url = f'{server}{api_path}?expanded=true&limit={limit}'
+            url = f'{client.server}{api_path}?expanded=true&limit={limit}'
         elif limit not in (['no','n','']) and expand in (['no','n','']):
-            url = f'{server}{api_path}?limit={limit}'
+            url = f'{client.server}{api_path}?limit={limit}'
         elif limit in (['no','n','']) and expand in (['yes','ye','y']):
-            url = f'{server}{api_path}?expanded=true'
+            url = f'{client.server}{api_path}?expanded=true'
     if url[-1] == '/':
         url = url[:-1]
 
     # Perform API GET call
     print(f'Performing API GET to: {url}')
+    r = None
+    resp = None
     try:
         # REST call with SSL verification turned off:
-        r = requests.get(url, headers=headers, verify=False)
+        r = client.get(url)
         status_code = r.status_code
         resp = r.json()
         if (status_code == 200):
@@ -108,9 +141,10 @@ def blank_get(server,headers,username,password):
         else:
             r.raise_for_status()
             print(f'Error occurred in GET --> {resp}')
-    except requests.exceptions.HTTPError as err:
+    except requests.exceptions.RequestException as err:
         print(f'Error in connection --> {err}')
-        print(json.dumps(resp,indent=4))
+        if resp is not None:
+            print(json.dumps(resp,indent=4))
     # End
     finally:
         try:
@@ -123,7 +157,7 @@ def blank_get(server,headers,username,password):
 #
 #
 # Define Network Object POST Script as Funtion
-def post_network_object(server,headers,username,password):
+def post_network_object(client,chunk_size=BULK_LIMIT):
     print ('''
 ***********************************************************************************************
 *                          Create Network Objects in bulk                                     *
@@ -143,11 +177,8 @@ def post_network_object(server,headers,username,password):
 ***********************************************************************************************
 ''')
 
-    print('Generating Access Token')
-    # Generate Access Token and pull domains from auth headers
-    results=access_token(server,headers,username,password)
-    headers['X-auth-access-token']=results[0]
-    domains = results[1]
+    # Pull domains from shared Access Token
+    domains = client.domains()
 
     if len(domains) > 1:
         API_UUID = select('Domain',domains)['uuid']
@@ -157,19 +188,19 @@ def post_network_object(server,headers,username,password):
     objTypes = [
         {
             'name':'Host',
-            'url':f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/hosts?bulk=true'
+            'url':f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/hosts?bulk=true'
         },
         {
             'name':'Range',
-            'url':f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/ranges?bulk=true'
+            'url':f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/ranges?bulk=true'
         },
         {
             'name':'Network',
-            'url':f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/networks?bulk=true'
+            'url':f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/networks?bulk=true'
         },
         {
             'name':'FQDN',
-            'url':f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/fqdns?bulk=true'
+            'url':f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/fqdns?bulk=true'
         }
     ]
     # Select type of Object to post
@@ -188,43 +219,34 @@ def post_network_object(server,headers,username,password):
         else:
             print('MUST PROVIDE INPUT FILE...')
 
-    post_data = []
-    # Create For Loop To Process Each Item In CSV
-    for row in my_csv_reader:
-        objName = row[0]
-        address = row[1]
-        post_data.append({
-            'name': objName,
-            'type': objType['name'],
-            'description': '',
-            'value': address
-        })
-
-    try:
-        # REST call with SSL verification turned off:
-        url = objType['url']
-        r = requests.post(url, data=json.dumps(post_data), headers=headers, verify=False)
-        status_code = r.status_code
-        resp = r.text
-        print(f'Status code is: {status_code}')
-        if status_code == 201 or status_code == 202:
-            print('Network Objects successfully created...')
-        else :
-            print(f'Error occurred in POST --> {json.dumps(r.json(),indent=4)}')
-            r.raise_for_status()
-    except requests.exceptions.HTTPError as err:
-        print (f'Error in connection --> {traceback.format_exc()}')
-    finally:
-        try:
-            if r: r.close()
-        except:
-            None
+    # Stream CSV rows as objects
+    post_data = ({
+        'name': row[0],
+        'type': objType['name'],
+        'description': '',
+        'value': row[1]
+    } for row in my_csv_reader)
+
+    # POST objects in concurrent chunks of at most 1000 items, retrying failed chunks
+    url = objType['url']
+    results = post_bulk_chunks(client,url,iter_chunks(post_data,min(chunk_size,BULK_LIMIT)))
+    open_read_csv.close()
+
+    created = sum(len(i['items']) for i in results)
+    failed = [i for i in results if i['error']]
+    print(f'*\n*\nNetwork Objects created: {created}, failed chunks: {len(failed)}')
+    for i in failed:
+        print(f'Error occurred in POST of chunk {i["chunk"]} --> {i["error"]}')
+
+    # Discard cached Object Index and Object Store, now missing new objects
+    client.object_index(API_UUID).invalidate()
+    if client.store: client.store.invalidate(API_UUID,['Host','Network','Range','FQDN','NetworkGroup'])
 
 #
 #
 #
 # Define Network Object-Group POST Script as Funtion
-def post_network_object_group(server,headers,username,password):
+def post_network_object_group(client):
     print ('''
 ***********************************************************************************************
 *                     Create Network Objects and Object Groups in bulk                        *
@@ -234,17 +256,15 @@ def post_network_object_group(server,headers,username,password):
 *                                                                                             *
 *  1. TXT Data Input file                                                                     *
 *       # Output from ASA "show run object network" and "show run object-group network"       *
+*       # Full "show run" output is accepted, other configuration is skipped                  *
 *       # Ensure no object names overlap with existing objects                                *
-*       # Ensure nested groups are above groups nesting them                                  *
+*       # Nested groups may be in any order, and are created before groups nesting them       *
 *                                                                                             *
 ***********************************************************************************************
 ''')
 
-    print('Generating Access Token')
-    # Generate Access Token and pull domains from auth headers
-    results=access_token(server,headers,username,password)
-    headers['X-auth-access-token']=results[0]
-    domains = results[1]
+    # Pull domains from shared Access Token
+    domains = client.domains()
 
     if len(domains) > 1:
         API_UUID = select('Domain',domains)['uuid']
@@ -256,237 +276,92 @@ def post_network_object_group(server,headers,username,password):
         # Request Input File
         read_file = input('Please Enter Input File /full/file/path.txt: ').strip()
         if os.path.isfile(read_file):
-            # Read csv file
-            open_read_file = open(read_file, 'r').read()
             Test = True
         else:
             print('MUST PROVIDE INPUT FILE...')
 
-    tempData = {
-        'objects':[],
-        'groups':[]
-    }
-
-    SPLIT = re.split(r'\nobject',open_read_file)
-    for item in SPLIT:
-        obj = item.splitlines()
-        name = obj[0].split()[-1]
-        if obj[0].startswith('-group'):
-            obj.pop(0)
-            tempData['groups'].append({'name':name,'entries':obj})
-        else:
-            obj.pop(0)
-            tempData['objects'].append({'name':name,'entry':obj[0].strip()})
-
-    Data = {
-        'objects': {
-            'Host':[],
-            'Network':[],
-            'Range':[],
-            'FQDN':[]
-        },
-        'groups':{}
-    }
-
-    for obj in tempData['objects']:
-        objName = obj['name']
-        if obj['entry'].startswith('host'):
-            objType = 'Host'
-            address = obj['entry'].split()[-1]
-            Data['objects']['Host'].append({
-                'name': objName,
-                'type': objType,
-                'description': '',
-                'value': address
-            })
-        elif obj['entry'].startswith('subnet'):
-            objType = 'Network'
-            address = f'{obj["entry"].split()[-2]}/{obj["entry"].split()[-1]}'
-            Data['objects']['Network'].append({
-                'name': objName,
-                'type': objType,
-                'description': '',
-                'value': address
-            })
-        elif obj['entry'].startswith('range'):
-            objType = 'Range'
-            address = f'{obj["entry"].split()[-2]}-{obj["entry"].split()[-1]}'
-            Data['objects']['Range'].append({
-                'name': objName,
-                'type': objType,
-                'description': '',
-                'value': address
-            })
-        if obj['entry'].startswith('fqdn'):
-            objType = 'FQDN'
-            address = obj['entry'].split()[-1]
-            Data['objects']['FQDN'].append({
-                'name': objName,
-                'type': objType,
-                'description': '',
-                'value': address
-            })
-
-
-    # Post Host objects, and store JSON response with object uuids
-    try:
-        # REST call with SSL verification turned off:
-        post_data = Data['objects']['Host']
-        url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/hosts?bulk=true'
-        r = requests.post(url, data=json.dumps(post_data), headers=headers, verify=False)
-        status_code = r.status_code
-        resp = r.text
-        print(f'Status code is: {status_code}')
-        if status_code == 201 or status_code == 202:
-            print('Network Objects successfully created...')
-            Data['objects']['Host'] = r.json()['items']
-        else :
-            print(f'Error occurred in POST --> {json.dumps(r.json(),indent=4)}')
-            r.raise_for_status()
-    except requests.exceptions.HTTPError as err:
-        print (f'Error in connection --> {traceback.format_exc()}')
-    finally:
-        try:
-            if r: r.close()
-        except:
-            None
-
-    # Post Network objects, and store JSON response with object uuids
-    try:
-        # REST call with SSL verification turned off:
-        post_data = Data['objects']['Network']
-        url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/networks?bulk=true'
-        r = requests.post(url, data=json.dumps(post_data), headers=headers, verify=False)
-        status_code = r.status_code
-        resp = r.text
-        print(f'Status code is: {status_code}')
-        if status_code == 201 or status_code == 202:
-            print('Network Objects successfully created...')
-            Data['objects']['Network'] = r.json()['items']
-        else :
-            print(f'Error occurred in POST --> {json.dumps(r.json(),indent=4)}')
-            r.raise_for_status()
-    except requests.exceptions.HTTPError as err:
-        print (f'Error in connection --> {traceback.format_exc()}')
-    finally:
-        try:
-            if r: r.close()
-        except:
-            None
-
-    # Post Ranges objects, and store JSON response with object uuids
-    try:
-        # REST call with SSL verification turned off:
-        post_data = Data['objects']['Range']
-        url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/ranges?bulk=true'
-        r = requests.post(url, data=json.dumps(post_data), headers=headers, verify=False)
-        status_code = r.status_code
-        resp = r.text
-        print(f'Status code is: {status_code}')
-        if status_code == 201 or status_code == 202:
-            print('Network Objects successfully created...')
-            Data['objects']['Range'] = r.json()['items']
-        else :
-            print(f'Error occurred in POST --> {json.dumps(r.json(),indent=4)}')
-            r.raise_for_status()
-    except requests.exceptions.HTTPError as err:
-        print (f'Error in connection --> {traceback.format_exc()}')
-    finally:
-        try:
-            if r: r.close()
-        except:
-            None
-
-    # Post FQDN objects, and store JSON response with object uuids
-    try:
-        # REST call with SSL verification turned off:
-        post_data = Data['objects']['FQDN']
-        url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/fqdns?bulk=true'
-        r = requests.post(url, data=json.dumps(post_data), headers=headers, verify=False)
-        status_code = r.status_code
-        resp = r.text
-        print(f'Status code is: {status_code}')
-        if status_code == 201 or status_code == 202:
-            print('Network Objects successfully created...')
-            Data['objects']['FQDN'] = r.json()['items']
-        else :
-            print(f'Error occurred in POST --> {json.dumps(r.json(),indent=4)}')
-            r.raise_for_status()
-    except requests.exceptions.HTTPError as err:
-        print (f'Error in connection --> {traceback.format_exc()}')
-    finally:
-        try:
-            if r: r.close()
-        except:
-            None
+    # Stream objects by type, and group entries by group name, other configuration is skipped
+    with open(read_file, 'r') as infile:
+        Data,groupEntries = load_network_objects(infile)
+
+    # Arrange groups by nested group dependencies, and validate references before any API call
+    objNames = {i['name'] for v in Data['objects'].values() for i in v}
+    groupDeps = {}
+    missingObjs = []
+    for name,entries in groupEntries.items():
+        groupDeps[name] = []
+        for item in entries:
+            fields = item.split()
+            if fields[:1] == ['group-object']:
+                groupDeps[name].append(fields[-1])
+            elif (fields[:2] == ['network-object','object']) and (fields[-1] not in objNames):
+                missingObjs.append(f'{name} -> {fields[-1]}')
+    levels,missingGroups,cyclic = group_levels(groupDeps)
+    if missingObjs or missingGroups or cyclic:
+        for item in missingObjs:
+            print(f'Object not defined in input file --> {item}')
+        for item in missingGroups:
+            print(f'Object group not defined in input file --> {item}')
+        for item in cyclic:
+            print(f'Object group nesting cycle --> {item}')
+        print('*\n*\nNo objects created, correct input file and attempt again...')
+        return
 
-    for obj in tempData['groups']:
-        objName = obj['name']
-        Obj = {
-            'name': objName,
-            'type': 'NetworkGroup',
-            'objects': [],
-            'literals': []
-        }
-        for item in obj['entries']:
-            if 'network-object host ' in item:
-                address = item.split()[-1]
-                Obj['literals'].append({
-                    'type': 'Host',
-                    'value': address
-                })
-            elif 'network-object object ' in item:
-                nestObjName = item.split()[-1]
-                for k,v in Data['objects'].items():
-                    for i in v:
-                        if i['name'] == nestObjName:
-                            Obj['objects'].append({
-                                'type': i['type'],
-                                'id': i['id']
-                            })
-            elif 'network-object ' in item:
-                address = f'{item.split()[-2]}/{item.split()[-1]}'
-                Obj['literals'].append({
-                    'type': 'Network',
-                    'value': address
-                })
-            elif 'group-object ' in item:
-                nestObjName = item.split()[-1]
-                i = Data['groups'][nestObjName]
-                Obj['objects'].append({
-                    'type': i['type'],
-                    'id': i['id']
-                })
-
-        # Post object group, and store JSON response with object uuids
-        try:
-            # REST call with SSL verification turned off:
-            post_data = Obj
-            url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/networkgroups'
-            r = requests.post(url, data=json.dumps(post_data), headers=headers, verify=False)
-            status_code = r.status_code
-            resp = r.text
-            print(f'Status code is: {status_code}')
-            if status_code == 201 or status_code == 202:
-                print('Network Object Group successfully created...')
-                Data['groups'].update({objName:r.json()})
-            else :
-                print(f'Error occurred in POST --> {json.dumps(r.json(),indent=4)}')
-                r.raise_for_status()
-        except requests.exceptions.HTTPError as err:
-            print (f'Error in connection --> {traceback.format_exc()}')
-        finally:
-            try:
-                if r: r.close()
-            except:
-                None
+    # Post objects in concurrent bulk chunks, and index created objects by name
+    objIndex = {}
+    for objType,collection in [('Host','hosts'),('Network','networks'),('Range','ranges'),('FQDN','fqdns')]:
+        if Data['objects'][objType] == []:
+            continue
+        print(f'*\n*\nCREATING {len(Data["objects"][objType])} {objType} OBJECTS...')
+        url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/{collection}?bulk=true'
+        for result in post_bulk_chunks(client,url,iter_chunks(Data['objects'][objType],BULK_LIMIT)):
+            for i in result['items']:
+                objIndex[i['name']] = {'type':i['type'],'id':i['id']}
+
+    # Post object groups one dependency level at a time, levels are created in concurrent bulk chunks
+    # Created groups are indexed by name for groups nesting them in later levels
+    # Groups referencing an object or group which was not created are not posted,
+    # so groups nesting them in later levels are not posted either
+    groupIndex = {}
+    dropped = {}
+    failed = []
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/networkgroups?bulk=true'
+    for level,names in enumerate(levels):
+        print(f'*\n*\nCREATING {len(names)} NETWORK OBJECT GROUPS, DEPENDENCY LEVEL {level}...')
+        post_data = []
+        for objName in names:
+            Obj,missing = build_network_group(objName,groupEntries[objName],objIndex,groupIndex)
+            if missing:
+                dropped[objName] = missing
+                continue
+            post_data.append(Obj)
+        for result in post_bulk_chunks(client,url,iter_chunks(post_data,BULK_LIMIT)):
+            for i in result['items']:
+                groupIndex[i['name']] = {'type':i['type'],'id':i['id']}
+            if result['error']:
+                failed.append(result)
+
+    # Report groups not created, failed chunks and references to objects or groups which failed to be created
+    print(f'*\n*\nObjects created: {len(objIndex)}, Object Groups created: {len(groupIndex)}/{len(groupEntries)}')
+    for i in failed:
+        print(f'Error occurred in POST of Object Group chunk {i["chunk"]} --> {i["error"]}')
+    for objName in groupEntries:
+        if objName in dropped:
+            for item in dropped[objName]:
+                print(f'Object Group not created, reference was not created --> {item}')
+        elif objName not in groupIndex:
+            print(f'Object Group not created, POST failed --> {objName}')
+
+    # Discard cached Object Index and Object Store, now missing new objects
+    client.object_index(API_UUID).invalidate()
+    if client.store: client.store.invalidate(API_UUID,['Host','Network','Range','FQDN','NetworkGroup'])
 
 
 #
 #
 #
 # Define IPS/File Policy Put Script as Funtion
-def put_intrusion_file(server,headers,username,password):
+def put_intrusion_file(client):
     print ('''
 ***********************************************************************************************
 *                     Update IPS and/or File Policy for Access Rules                          *
@@ -509,11 +384,8 @@ def put_intrusion_file(server,headers,username,password):
 ***********************************************************************************************
 ''')
 
-    print('Generating Access Token')
-    # Generate Access Token and pull domains from auth headers
-    results=access_token(server,headers,username,password)
-    headers['X-auth-access-token']=results[0]
-    domains = results[1]
+    # Pull domains from shared Access Token
+    domains = client.domains()
 
     if len(domains) > 1:
         API_UUID = select('Domain',domains)['uuid']
@@ -535,21 +407,21 @@ def put_intrusion_file(server,headers,username,password):
 
     # Get all Access Control Policies
     print('*\n*\nCOLLECTING Access Policies...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies?expanded=true&offset=0&limit=1000'
-    acp_list = get_items(url,headers)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies?expanded=true&offset=0&limit=1000'
+    acp_list = get_items(url,client)
 
     acp = select('Access Control Policy',acp_list)
     #print(json.dumps(acp,indent=4))
 
     # Get all Access Control Policy rules
     print('*\n*\nCOLLECTING Access Policy rules...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies/{acp["id"]}/accessrules?offset=0&limit=1000&expanded=true'
-    acp_rules = get_items(url,headers)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies/{acp["id"]}/accessrules?offset=0&limit=1000&expanded=true'
+    acp_rules = get_items(url,client,parallel=MAX_PARALLEL)
 
     # Get all Intrusion Policies
     print('*\n*\nCOLLECTING Intusion Policies...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/intrusionpolicies?offset=0&limit=1000'
-    ips_list = get_items(url,headers)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/intrusionpolicies?offset=0&limit=1000'
+    ips_list = get_items(url,client)
     # Add None option
     ips_list.append({'None':'None'})
     ips = select('Intusion Policy',ips_list)
@@ -558,16 +430,16 @@ def put_intrusion_file(server,headers,username,password):
     if ips:
         # Get all Variable Sets
         print('*\n*\nCOLLECTING Variable Sets...')
-        url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/variablesets?offset=0&limit=1000'
-        vset_list = get_items(url,headers)
+        url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/variablesets?offset=0&limit=1000'
+        vset_list = get_items(url,client)
         vset = select('Variable Set',vset_list)
     else:
         vset = None
 
     # Get all File Policies
     print('*\n*\nCOLLECTING File Policies...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/filepolicies?offset=0&limit=1000'
-    file_list = get_items(url,headers)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/filepolicies?offset=0&limit=1000'
+    file_list = get_items(url,client)
     # Add None option
     file_list.append({'None':'None'})
     filepolicy = select('File Policy',file_list)
@@ -584,49 +456,20 @@ def put_intrusion_file(server,headers,username,password):
         print(f'*\n*\nNo IPS or File policy selected, Exiting...\n')
         return
 
-    # For Loop to update all rules
-    for item in acp_rules:
-        if (ips) and ((all_rules) or ('ipsPolicy' in item)):
-            # Create IPS Policy
-            item ['ipsPolicy'] = {}
-            # Assign Values
-            item ['ipsPolicy']['id'] = ips['id']
-            item ['ipsPolicy']['name'] = ips['name']
-            item ['ipsPolicy']['type'] = 'IntrusionPolicy'
-            # Create VariableSet
-            item ['variableSet'] = {}
-            # Assign Values
-            item ['variableSet']['id'] = vset['id']
-            item ['variableSet']['name'] = vset['name']
-            item ['variableSet']['type'] = 'VariableSet'
-        if (filepolicy) and ((all_rules) or ('filePolicy' in item)):
-            # Create FilePolicy
-            item ['filePolicy'] = {}
-            # Assign Values
-            item ['filePolicy']['id'] = filepolicy['id']
-            item ['filePolicy']['name'] = filepolicy['name']
-            item ['filePolicy']['type'] = 'FilePolicy'
-
-        # Delete Unprocessable items
-        del item['links']
-        del item['metadata']
-        if 'commentHistoryList' in item:
-            del item['commentHistoryList']
-        if ('logFiles' in item) and ('filePolicy' not in item):
-            del item['logFiles']
+    # Apply selected IPS/File policy to all rules
+    update_rule_policies(acp_rules,ips,vset,filepolicy,all_rules)
 
     if len(acp_rules) > 500:
         print(f'*\n*\nModifying a large number of rules, please be patient...\n')
-    # Send PUT requests with a maximum 1000 items per request
-    while len(acp_rules) !=0:
-        if len(acp_rules) >= 1000:
-            put_data = acp_rules[:1000]
-            put_bulk_acp_rules(server,headers,username,password,API_UUID,acp['id'],put_data)
-            acp_rules = acp_rules[1000:]
-        else:
-            put_data = acp_rules[:len(acp_rules)]
-            put_bulk_acp_rules(server,headers,username,password,API_UUID,acp['id'],put_data)
-            acp_rules = acp_rules[len(acp_rules):]
+    # Send PUT requests concurrently, chunk size adapts to FMC response time, maximum 1000 items per request
+    start = time.time()
+    results = put_bulk_acp_rules(client,API_UUID,acp['id'],acp_rules)
+    updated = sum(result['count'] for result in results if not result['error'])
+    failed = [result for result in results if result['error'] and not result['retried']]
+    print(f'*\n*\n{updated} of {len(acp_rules)} rules updated in {len(results)} chunks, {time.time()-start:.1f}s')
+    for result in failed:
+        print(f'Rules {result["first"]}-{result["first"]+result["count"]-1} failed, status code:--> {result["status"]}')
+        print(f'Error occurred in PUT --> {result["error"]}')
 
 
 
@@ -634,7 +477,7 @@ def put_intrusion_file(server,headers,username,password):
 #
 #
 # Define Inventory List Script as Funtion
-def get_inventory(server,headers,username,password):
+def get_inventory(client):
     print ('''
 ***********************************************************************************************
 *                           Pull Full FMC Device Inventory List                               *
@@ -643,31 +486,41 @@ def get_inventory(server,headers,username,password):
 ***********************************************************************************************
 ''')
 
-    print('Generating Access Token')
-    # Generate Access Token and pull domains from auth headers
-    results=access_token(server,headers,username,password)
-    headers['X-auth-access-token']=results[0]
-    domains = results[1]
+    # Pull domains from shared Access Token
+    domains = client.domains()
 
     if len(domains) > 1:
         API_UUID = select('Domain',domains)['uuid']
     else:
         API_UUID = domains[0]['uuid']
 
-    # Get all Devices
-    print('*\n*\nCOLLECTING ALL INVENTORY...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/devices/devicerecords?expanded=true&offset=0&limit=1000'
-    DEVICELIST_DATA = get_items(url,headers)
+    # Ask if interfaces, health alerts and deployment state should be collected per device
+    deep = False
+    Test = False
+    while not Test:
+        choice = input('Would You Like To Collect Interfaces, Health Alerts and Deployment State? [y/N]: ').lower()
+        if choice in (['yes','ye','y']):
+            deep = True
+            Test = True
+        elif choice in (['no','n','']):
+            Test = True
+        else:
+            print('Invalid Selection...\n')
 
-    # Get all Cluster Devices
-    print('*\n*\nCOLLECTING CLUSTER INVENTORY...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/deviceclusters/ftddevicecluster?expanded=true&offset=0&limit=1000'
-    CLUSTER_DATA = get_items(url,headers)
+    # Get all Devices, Cluster Devices and HA Devices, collections and their pages are collected concurrently
+    print('*\n*\nCOLLECTING ALL INVENTORY...')
+    DEVICELIST_DATA,CLUSTER_DATA,HA_DATA = get_collections([
+        f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/devices/devicerecords?expanded=true&offset=0&limit=1000',
+        f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/deviceclusters/ftddevicecluster?expanded=true&offset=0&limit=1000',
+        f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/devicehapairs/ftddevicehapairs?expanded=true&offset=0&limit=1000'
+    ],client)
+    DEVICELIST_DATA = [get_device_record(item) for item in DEVICELIST_DATA]
+    CLUSTER_DATA = [{'name':i['name'],'masterDevice':{'id':i['masterDevice']['id']},'slaveDevices':[{'id':d['id']} for d in i['slaveDevices']]} for i in CLUSTER_DATA]
+    HA_DATA = [{'name':i['name'],'primary':{'id':i['primary']['id']},'secondary':{'id':i['secondary']['id']}} for i in HA_DATA]
 
-    # Get all HA Devices
-    print('*\n*\nCOLLECTING HA PAIR INVENTORY...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/devicehapairs/ftddevicehapairs?expanded=true&offset=0&limit=1000'
-    HA_DATA = get_items(url,headers)
+    # Collect per device details in parallel
+    if deep:
+        collect_device_details(client,API_UUID,DEVICELIST_DATA)
 
 
     ## TEST PRINT
@@ -675,171 +528,9 @@ def get_inventory(server,headers,username,password):
     #print(json.dumps(CLUSTER_DATA,indent=4))
     #print(json.dumps(HA_DATA,indent=4))
 
-    # Create Base Dict
-    INVENTORY = {
-        'deviceClusters':[],
-        'deviceHAPairs':[],
-        'devices':[]
-        }
-
-    if CLUSTER_DATA != []:
-        for item in CLUSTER_DATA:
-            temp_dict = {}
-            temp_dict['name']= item['name']
-            temp_dict['masterDevice'] = get_device_details(item['masterDevice']['id'],DEVICELIST_DATA)
-            temp_dict['slaveDevices'] = []
-            for item in item['slaveDevices']:
-                temp_dict['slaveDevices'].append(get_device_details(item['id'],DEVICELIST_DATA))
-            INVENTORY['deviceClusters'].append(temp_dict)
-
-    if HA_DATA != []:
-        for item in HA_DATA:
-            temp_dict = {}
-            temp_dict['name']= item['name']
-            temp_dict['primary'] = get_device_details(item['primary']['id'],DEVICELIST_DATA)
-            temp_dict['secondary'] = get_device_details(item['secondary']['id'],DEVICELIST_DATA)
-            INVENTORY['deviceHAPairs'].append(temp_dict)
-
-    if DEVICELIST_DATA != []:
-        for item in DEVICELIST_DATA:
-            temp_dict = {}
-            temp_dict['name'] = item['name']
-            temp_dict['model'] = item['model']
-            temp_dict['hostname'] = item['hostName']
-            temp_dict['healthStatus'] = item['healthStatus']
-            temp_dict['sw_version'] = item['sw_version']
-            temp_dict['license_caps'] = item['license_caps']
-            temp_dict['ftdMode'] = ''
-            if 'ftdMode' in item: temp_dict['ftdMode'] = item['ftdMode']
-            temp_dict['deviceSerialNumber'] = ''
-            if 'deviceSerialNumber' in item['metadata']: temp_dict['deviceSerialNumber'] = item['metadata']['deviceSerialNumber']
-            if 'sruVersion' in item['metadata']: temp_dict['sru_version'] = item['metadata']['sruVersion']
-            if 'vdbVersion' in item['metadata']: temp_dict['vdb_version'] = item['metadata']['vdbVersion']
-            if 'snortVersion' in item['metadata']: temp_dict['snort_version'] = item['metadata']['snortVersion']
-            if 'chassisData' in item['metadata']: temp_dict['chassisData'] = item['metadata']['chassisData']
-            INVENTORY['devices'].append(temp_dict)
-
-
-    print('*\n*\nFMC Inventory compilation successful...')
-    # Ask if JSON output should be saved to File
-    save = input('Would You Like To Save The JSON Output To File? [y/N]: ').lower()
-    if save in (['yes','ye','y']):
-        # Random Generated JSON Output File
-        filename = ''.join(i for i in [chr(random.randint(97,122)) for i in range(6)])
-        filename += '.json'
-        print(f'*\n*\nRANDOM OUTPUT FILE CREATED... {filename}\n')
-        with open(filename, 'a') as OutFile:
-            OutFile.write(json.dumps(INVENTORY,indent=4))
-    elif save in (['no','n','']):
-        print(json.dumps(INVENTORY,indent=4))
-
-    # Ask if CSV output should be saved to File
-    save = input('Would You Like To Save CSV Output To File? [y/N]: ').lower()
-    if save in (['yes','ye','y']):
-        # Random Generated CSV Output File
-        filename = ''.join(i for i in [chr(random.randint(97,122)) for i in range(6)])
-        filename += '.csv'
-        print(f'*\n*\nRANDOM OUTPUT FILE CREATED... {filename}\n')
-        with open(filename, 'a') as OutFile:
-            OutFile.write('NAME,MODEL,VERSION,STATUS,SERIAL,MODE,LICENSE,SRU,VDB,SNORT\n')
-            if INVENTORY['deviceClusters'] != []:
-                for item in INVENTORY['deviceClusters']:
-                    mode = ''
-                    sru_version = ''
-                    vdb_version = ''
-                    snort_version = ''
-                    serial = ''
-                    name = item['masterDevice']['name']
-                    model = item['masterDevice']['model']
-                    version = item['masterDevice']['sw_version']
-                    status = item['masterDevice']['healthStatus']
-                    license = ';'.join(item['masterDevice']['license_caps'])
-                    if 'ftdMode' in item['masterDevice']: mode = item['masterDevice']['ftdMode']
-                    if 'sru_version' in item['masterDevice']: sru_version = item['masterDevice']['sru_version']
-                    if 'vdb_version' in item['masterDevice']: vdb_version = item['masterDevice']['vdb_version']
-                    if 'snort_version' in item['masterDevice']: snort_version = item['masterDevice']['snort_version']
-                    if 'chassisData' in item['masterDevice']: serial = item['masterDevice']['chassisData']['chassisSerialNo']
-                    OutFile.write(f'{name},{model},{version},{status},{serial},{mode},{license},{sru_version},{vdb_version},{snort_version}\n')
-                    for item in item['slaveDevices']:
-                        mode = ''
-                        sru_version = ''
-                        vdb_version = ''
-                        snort_version = ''
-                        serial = ''
-                        name = item['name']
-                        model = item['model']
-                        version = item['sw_version']
-                        status = item['healthStatus']
-                        license = ';'.join(item['license_caps'])
-                        if 'ftdMode' in item: mode = item['ftdMode']
-                        if 'sru_version' in item: sru_version = item['sru_version']
-                        if 'vdb_version' in item: vdb_version = item['vdb_version']
-                        if 'snort_version' in item: snort_version = item['snort_version']
-                        if 'chassisData' in item: serial = item['chassisData']['chassisSerialNo']
-                        OutFile.write(f'{name},{model},{version},{status},{serial},{mode},{license},{sru_version},{vdb_version},{snort_version}\n')
-            if INVENTORY['deviceHAPairs'] != []:
-                for item in INVENTORY['deviceHAPairs']:
-                    mode = ''
-                    sru_version = ''
-                    vdb_version = ''
-                    snort_version = ''
-                    serial = ''
-                    name = item['primary']['name']
-                    model = item['primary']['model']
-                    version = item['primary']['sw_version']
-                    status = item['primary']['healthStatus']
-                    license = ';'.join(item['primary']['license_caps'])
-                    if 'ftdMode' in item['primary']: mode = item['primary']['ftdMode']
-                    if 'sru_version' in item['primary']: sru_version = item['primary']['sru_version']
-                    if 'vdb_version' in item['primary']: vdb_version = item['primary']['vdb_version']
-                    if 'snort_version' in item['primary']: snort_version = item['primary']['snort_version']
-                    if 'chassisData' in item['primary']:
-                        serial = item['primary']['chassisData']['chassisSerialNo']
-                    elif 'deviceSerialNumber' in item['primary']:
-                        serial = item['primary']['deviceSerialNumber']
-                    OutFile.write(f'{name},{model},{version},{status},{serial},{mode},{license},{sru_version},{vdb_version},{snort_version}\n')
-                    mode = ''
-                    sru_version = ''
-                    vdb_version = ''
-                    snort_version = ''
-                    serial = ''
-                    name = item['secondary']['name']
-                    model = item['secondary']['model']
-                    version = item['secondary']['sw_version']
-                    status = item['secondary']['healthStatus']
-                    license = ';'.join(item['secondary']['license_caps'])
-                    if 'ftdMode' in item['secondary']: mode = item['secondary']['ftdMode']
-                    if 'sru_version' in item['secondary']: sru_version = item['secondary']['sru_version']
-                    if 'vdb_version' in item['secondary']: vdb_version = item['secondary']['vdb_version']
-                    if 'snort_version' in item['secondary']: snort_version = item['secondary']['snort_version']
-                    if 'chassisData' in item['secondary']:
-                        serial = item['secondary']['chassisData']['chassisSerialNo']
-                    elif 'deviceSerialNumber' in item['secondary']:
-                        serial = item['secondary']['deviceSerialNumber']
-                    OutFile.write(f'{name},{model},{version},{status},{serial},{mode},{license},{sru_version},{vdb_version},{snort_version}\n')
-            if INVENTORY['devices'] != []:
-                for item in INVENTORY['devices']:
-                    serial = item['deviceSerialNumber']
-                    name = item['name']
-                    model = item['model']
-                    hostname = item['hostname']
-                    version = item['sw_version']
-                    license = ';'.join(item['license_caps'])
-                    status = item['healthStatus']
-                    mode = ''
-                    sru_version = ''
-                    vdb_version = ''
-                    snort_version = ''
-                    serial = ''
-                    if 'ftdMode' in item: mode = item['ftdMode']
-                    if 'sru_version' in item: sru_version = item['sru_version']
-                    if 'vdb_version' in item: vdb_version = item['vdb_version']
-                    if 'snort_version' in item: snort_version = item['snort_version']
-                    if 'chassisData' in item:
-                        serial = item['chassisData']['chassisSerialNo']
-                    elif 'deviceSerialNumber' in item:
-                        serial = item['deviceSerialNumber']
-                    OutFile.write(f'{name},{model},{version},{status},{serial},{mode},{license},{sru_version},{vdb_version},{snort_version}\n')
+    # Stream each Device to output as soon as it is joined
+    print('*\n*\nFMC Inventory collection successful...')
+    save_inventory(iter_inventory(DEVICELIST_DATA,CLUSTER_DATA,HA_DATA),client.server.replace('https://',''))
 
 
 
@@ -849,7 +540,7 @@ def get_inventory(server,headers,username,password):
 #
 #
 # Define Inventory List Script as Funtion
-def register_ftd(server,headers,username,password):
+def register_ftd(client):
     print ('''
 ***********************************************************************************************
 *                                   Register FTD to FMC                                       *
@@ -868,11 +559,8 @@ def register_ftd(server,headers,username,password):
 ***********************************************************************************************
 ''')
 
-    print('Generating Access Token')
-    # Generate Access Token and pull domains from auth headers
-    results=access_token(server,headers,username,password)
-    headers['X-auth-access-token']=results[0]
-    domains = results[1]
+    # Pull domains from shared Access Token
+    domains = client.domains()
 
     if len(domains) > 1:
         API_UUID = select('Domain',domains)['uuid']
@@ -889,8 +577,8 @@ def register_ftd(server,headers,username,password):
 
     # Create Get DATA JSON Dictionary to collect all ACP names
     print('*\n*\nCOLLECTING Access Policies...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies?offset=0&limit=1000'
-    acp_list = get_items(url,headers)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies?offset=0&limit=1000'
+    acp_list = get_items(url,client)
     if acp_list == []:
         print('*\n*\nNO ACCESS POLICY CONFIGURED...\nCREATE ACCESS POLICY IN FMC AND ATTEMPT AGAIN...')
         return
@@ -916,11 +604,11 @@ def register_ftd(server,headers,username,password):
     }
 
 
-    url =f'{server}/api/fmc_config/v1/domain/{API_UUID}/devices/devicerecords'
+    url =f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/devices/devicerecords'
     print(f'\nPerforming API POST to: {url}...\n')
     try:
         # REST call with SSL verification turned off:
-        r = requests.post(url, data=json.dumps(post_data), headers=headers, verify=False)
+        r = client.post(url, data=json.dumps(post_data))
         status_code = r.status_code
         resp = r.text
         print(f'Status code is: {status_code}')
@@ -930,7 +618,7 @@ def register_ftd(server,headers,username,password):
         else :
             r.raise_for_status()
             print (f'Error occurred in POST --> {resp}')
-    except requests.exceptions.HTTPError as err:
+    except requests.exceptions.RequestException as err:
         print (f'Error in connection --> {traceback.format_exc()}')
     finally:
         try:
@@ -942,7 +630,7 @@ def register_ftd(server,headers,username,password):
         # Connect to FTD, and initiate registration
         print('\nConnecting to FTD for CLI registration...')
         connection = netmiko.ConnectHandler(ip=FTD_IP, device_type='autodetect', username=FTD_user, password=FTD_pass, global_delay_factor=6)
-        output = connection.send_command(f'configure manager add {server.replace("https://","")} {regKey} cisco123')
+        output = connection.send_command(f'configure manager add {client.server.replace("https://","")} {regKey} cisco123')
         connection.disconnect()
         print('FTD Registration command successful...')
     except:
@@ -955,7 +643,7 @@ def register_ftd(server,headers,username,password):
 #
 #
 # Define Inventory List Script as Funtion
-def prefilter_to_acp(server,headers,username,password):
+def prefilter_to_acp(client):
     print ('''
 ***********************************************************************************************
 *                    Convert Prefilter rules to Access-Control rules                          *
@@ -972,29 +660,30 @@ def prefilter_to_acp(server,headers,username,password):
 ***********************************************************************************************
 ''')
 
-    print('Generating Access Token')
-    # Generate Access Token and pull domains from auth headers
-    results=access_token(server,headers,username,password)
-    headers['X-auth-access-token']=results[0]
-    domains = results[1]
+    # Pull domains from shared Access Token
+    domains = client.domains()
 
     if len(domains) > 1:
         API_UUID = select('Domain',domains)['uuid']
     else:
         API_UUID = domains[0]['uuid']
 
+    # Sync local Object Store if configured
+    if client.store:
+        client.store.sync(client,API_UUID,['AccessPolicy','IntrusionPolicy','VariableSet','FilePolicy'])
+
     # Get all Access Control Policies
     print('*\n*\nCOLLECTING Access Policies...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies?expanded=true&offset=0&limit=1000'
-    acp_list = get_items(url,headers)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies?expanded=true&offset=0&limit=1000'
+    acp_list = list(get_collection(client,API_UUID,'AccessPolicy',url))
 
     acp = select('Access Control Policy',acp_list)
     #print(json.dumps(acp,indent=4))
 
     # Get Prefilter Policy
     print('*\n*\nCOLLECTING Applied Prefilter Policy...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/prefilterpolicies/{acp["prefilterPolicySetting"]["id"]}/prefilterrules?expanded=true&offset=0&limit=1000'
-    prefilter_list = get_items(url,headers)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/prefilterpolicies/{acp["prefilterPolicySetting"]["id"]}/prefilterrules?expanded=true&offset=0&limit=1000'
+    prefilter_list = get_items(url,client)
 
     # Remove all 'TUNNEL' rules
     prefilter_list = [i for i in prefilter_list if i['ruleType'] != 'TUNNEL']
@@ -1005,16 +694,16 @@ def prefilter_to_acp(server,headers,username,password):
 
     # Get all Intrusion Policies
     print('*\n*\nCOLLECTING Intusion Policies...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/intrusionpolicies?offset=0&limit=1000'
-    ips_list = get_items(url,headers)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/intrusionpolicies?offset=0&limit=1000'
+    ips_list = list(get_collection(client,API_UUID,'IntrusionPolicy',url))
     # Add None option
     ips_list.append({'None':'None'})
     ips = select('Intusion Policy',ips_list)
 
     # Get all Variable Sets
     print('*\n*\nCOLLECTING Variable Sets...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/variablesets?offset=0&limit=1000'
-    vset_list = get_items(url,headers)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/variablesets?offset=0&limit=1000'
+    vset_list = list(get_collection(client,API_UUID,'VariableSet',url))
 
     # Get Default Variable Set
     for item in vset_list:
@@ -1029,8 +718,8 @@ def prefilter_to_acp(server,headers,username,password):
 
     # Get all File Policies
     print('*\n*\nCOLLECTING File Policies...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/filepolicies?offset=0&limit=1000'
-    file_list = get_items(url,headers)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/filepolicies?offset=0&limit=1000'
+    file_list = list(get_collection(client,API_UUID,'FilePolicy',url))
     # Add None option
     file_list.append({'None':'None'})
     filepolicy = select('File Policy',file_list)
@@ -1091,11 +780,11 @@ def prefilter_to_acp(server,headers,username,password):
 
     # Post newly migrated access rules
     print('*\n*\nPosting new Access Rules...')
-    url =f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies/{acp["id"]}/accessrules?bulk=true'
+    url =f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies/{acp["id"]}/accessrules?bulk=true'
     print(f'\nPerforming API POST to: {url}...\n')
     try:
         # REST call with SSL verification turned off:
-        r = requests.post(url, data=json.dumps(acp_data), headers=headers, verify=False)
+        r = client.post(url, data=json.dumps(acp_data))
         status_code = r.status_code
         resp = r.text
         print(f'Status code is: {status_code}')
@@ -1104,7 +793,7 @@ def prefilter_to_acp(server,headers,username,password):
         else :
             print (f'Error occurred in POST --> {resp}')
             r.raise_for_status()
-    except requests.exceptions.HTTPError as err:
+    except requests.exceptions.RequestException as err:
         print (f'Error in connection --> {traceback.format_exc()}')
     finally:
         try:
@@ -1119,7 +808,7 @@ def prefilter_to_acp(server,headers,username,password):
 #
 #
 # Object Group Compare and Update
-def obj_group_update(server,headers,username,password):
+def obj_group_update(client):
     print ('''
 ***********************************************************************************************
 *                    Update Object Group with entries from txt file                           *
@@ -1132,17 +821,14 @@ def obj_group_update(server,headers,username,password):
 *  2. Network Text File                                                                       *
 *                                                                                             *
 *       Notes:                                                                                *
-*          Supports groups with only IPv4 Host and Network objects                            *
+*          Supports groups with only IPv4/IPv6 Host and Network objects                       *
 *          Text file must contain only host IPs and networks with CIDR notation               *
 *                                                                                             *
 ***********************************************************************************************
 ''')
 
-    print('Generating Access Token')
-    # Generate Access Token and pull domains from auth headers
-    results=access_token(server,headers,username,password)
-    headers['X-auth-access-token']=results[0]
-    domains = results[1]
+    # Pull domains from shared Access Token
+    domains = client.domains()
 
     if len(domains) > 1:
         API_UUID = select('Domain',domains)['uuid']
@@ -1164,194 +850,184 @@ def obj_group_update(server,headers,username,password):
     fileEntries = open_read_file.splitlines()
 
 
-    # Collect all Network objects
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/networks?expanded=true&offset=0&limit=1000'
-    networks = get_items(url,headers)
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/hosts?expanded=true&offset=0&limit=1000'
-    hosts = get_items(url,headers)
-
-
-
-    url = f'{server}/api/fmc_config/v1/domain/e276abec-e0f2-11e3-8169-6d9ed49b625f/object/networkgroups?expanded=true&offset=0&limit=1000'
-    objGroupEntries = []
-    objGroups = get_items(url,headers)
-    objGroup = None
-    for g in objGroups:
-        if g['name'] == objGroupName:
-            objGroup = g
+    # Sync local Object Store if configured
+    if client.store:
+        client.store.sync(client,API_UUID,['Network','Host','NetworkGroup'])
+
+    # Look up group by name
+    objGroup = find_object(client,API_UUID,'NetworkGroup',objGroupName)
+
+    if objGroup:
+        # Look up only group members and file entries when it takes fewer requests than collecting
+        # all Host and Network objects, otherwise index them once by canonical address
+        #   Each member is one GET, each file entry one filtered GET per object type
+        fileEntries = [i.strip() for i in fileEntries if i.strip()]
+        members = [i for i in objGroup.get('objects',[]) if i['type'] in ('Host','Network')]
+        lookups = len(members) + 2*len([ip for ip in fileEntries if canonical_address(ip)])
+        if (not client.store) and (lookups <= FIND_LIMIT) and (lookups < collection_pages(client,API_UUID,['Network','Host'])):
+            objects = [get_object(client,API_UUID,i['type'],i['id']) for i in members]
+            for ip in fileEntries:
+                if canonical_address(ip):
+                    objects += find_by_value(client,API_UUID,ip,['Network','Host'])
+            objIndex,values = index_network_objects(i for i in objects if i)
+        else:
+            url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/networks?expanded=true&offset=0&limit=1000'
+            networks = get_collection(client,API_UUID,'Network',url)
+            url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/hosts?expanded=true&offset=0&limit=1000'
+            hosts = get_collection(client,API_UUID,'Host',url)
+            objIndex,values = index_network_objects(itertools.chain(networks,hosts))
 
     if not objGroup:
         print(f'Group name "{objGroupName}" not found')
         return
     else:
-        if 'literals' in objGroup:
-            for lit in objGroup['literals']:
-                if lit['type'] == 'Network':
-                    objGroupEntries.append(IPv4Network(lit['value']).with_prefixlen)
-                else:
-                    objGroupEntries.append(lit['value'])
-        if 'objects' in objGroup:
-            # Append networks with CIDR notation
-            objGroupEntries += [
-                IPv4Network(item['value']).with_prefixlen for item in networks if item['id'] in [i['id'] for i in objGroup['objects']]]
-            objGroupEntries += [
-                item['value'] for item in hosts if item['id'] in [i['id'] for i in objGroup['objects']]]
-
-        # Compile list of Missing entries on FMC
-        diffMissing = [ip for ip in fileEntries if ip not in objGroupEntries]
-        # Compile list of Extra entries on FMC
-        diffExtra = [ip for ip in objGroupEntries if ip not in fileEntries]
-
-        newLits = []
-        newObjs = []
-        newEntries = []
-        # Include literals if they are in the file entries
-        if 'literals' in objGroup:
-            for lit in objGroup['literals']:
-                if lit['type'] == 'Network':
-                    if IPv4Network(lit['value']).with_prefixlen in fileEntries:
-                        newEntries.append(IPv4Network(lit['value']).with_prefixlen)
-                        newLits.append(lit)
-                elif lit['value'] in fileEntries:
-                    newEntries.append(lit['value'])
-                    newLits.append(lit)
-
-        for ip in fileEntries:
-            if ('/' in ip) and (IPv4Network(ip).with_prefixlen not in newEntries):
-                for net in networks:
-                    try:
-                        if IPv4Network(ip).with_prefixlen == IPv4Network(net['value']).with_prefixlen:
-                            newObjs.append({
-                                'type': net['type'],
-                                'name': net['name'],
-                                'id': net['id']
-                            })
-                            newEntries.append(IPv4Network(ip).with_prefixlen)
-                    except:
-                        None
-            else:
-                for host in hosts:
-                    if (ip not in newEntries) and (ip == host['value']):
-                        newObjs.append({
-                            'type': host['type'],
-                            'name': host['name'],
-                            'id': host['id']
-                        })
-                        newEntries.append(ip)
-
-        missingObj = [ip for ip in fileEntries if ip not in newEntries]
-
-        createNets = {'data': [], 'result': []}
-        createHosts = {'data': [], 'result': []}
-        for ip in missingObj:
-            if '/' in ip:
-                createNets['data'].append({
-                    'name': f'Net-{ip.replace("/","-")}',
-                    'type': 'Network',
-                    'description': '',
-                    'value': ip
-                })
-            else:
-                createHosts['data'].append({
-                    'name': f'Host-{ip}',
-                    'type': 'Host',
-                    'description': '',
-                    'value': ip
-                })
-
-        if createNets['data'] != []:
-            # Post Network objects, and store JSON response with object uuids
-            try:
-                # REST call with SSL verification turned off:
-                post_data = createNets['data']
-                url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/networks?bulk=true'
-                r = requests.post(url, data=json.dumps(post_data), headers=headers, verify=False)
-                status_code = r.status_code
-                resp = r.text
-                print(f'Status code is: {status_code}')
-                if status_code == 201 or status_code == 202:
-                    print('Network Objects successfully created...')
-                    createNets['result'] = r.json()['items']
-                else :
-                    print(f'Error occurred in POST --> {json.dumps(r.json(),indent=4)}')
-                    r.raise_for_status()
-            except requests.exceptions.HTTPError as err:
-                print (f'Error in connection --> {traceback.format_exc()}')
-            finally:
-                try:
-                    if r: r.close()
-                except:
-                    None
-
-        if createHosts['data'] != []:
-            # Post Host objects, and store JSON response with object uuids
-            try:
-                # REST call with SSL verification turned off:
-                post_data = createHosts['data']
-                url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/hosts?bulk=true'
-                r = requests.post(url, data=json.dumps(post_data), headers=headers, verify=False)
-                status_code = r.status_code
-                resp = r.text
-                print(f'Status code is: {status_code}')
-                if status_code == 201 or status_code == 202:
-                    print('Network Objects successfully created...')
-                    createHosts['result'] = r.json()['items']
-                else :
-                    print(f'Error occurred in POST --> {json.dumps(r.json(),indent=4)}')
-                    r.raise_for_status()
-            except requests.exceptions.HTTPError as err:
-                print (f'Error in connection --> {traceback.format_exc()}')
-            finally:
-                try:
-                    if r: r.close()
-                except:
-                    None
-
-        for net in createNets['result']:
-            newObjs.append({
-                'type': net['type'],
-                'name': net['name'],
-                'id': net['id']
-            })
-
-        for host in createHosts['result']:
-            newObjs.append({
-                'type': host['type'],
-                'name': host['name'],
-                'id': host['id']
-            })
+        # Compile Missing and Extra entries on FMC, and new group entries
+        diff = diff_network_group(objGroup,fileEntries,objIndex,values)
+        for ip in diff['invalid']:
+            print(f'Invalid entry in file, skipped --> {ip}')
+
+        # Post missing objects in concurrent bulk chunks, and add created objects to group
+        created = create_network_objects(client,API_UUID,diff['create'])
+        newObjs = diff['objects'] + [created[ip] for ip in diff['create'] if ip in created]
+
+        # Discard cached Object Index, now missing new objects
+        if diff['create'] != []:
+            client.object_index(API_UUID).invalidate()
+            if client.store: client.store.invalidate(API_UUID,['Network','Host'])
+
+        # Group is not updated when objects failed to be created
+        missing = [ip for ip in diff['create'] if ip not in created]
+        if missing:
+            print(f'Group "{objGroupName}" not updated, objects not created --> {", ".join(missing)}')
+            return
 
         # Update Object Group data
-        del objGroup['links']
-        del objGroup['metadata']
         objGroup['objects'] = newObjs
-        objGroup['literals'] = newLits
+        objGroup['literals'] = diff['literals']
 
         # PUT object group
-        try:
-            # REST call with SSL verification turned off:
-            post_data = objGroup
-            url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/object/networkgroups/{objGroup["id"]}'
-            r = requests.put(url, data=json.dumps(post_data), headers=headers, verify=False)
-            status_code = r.status_code
-            resp = r.text
-            print(f'Status code is: {status_code}')
-            if status_code == 200:
-                print('Network Object Group successfully updated...')
-            else :
-                print(f'Error occurred in PUT --> {json.dumps(r.json(),indent=4)}')
-                r.raise_for_status()
-        except requests.exceptions.HTTPError as err:
-            print (f'Error in connection --> {traceback.format_exc()}')
-        finally:
-            try:
-                if r: r.close()
-            except:
-                None
+        status_code,error = put_network_group(client,API_UUID,objGroup)
+        print(f'Status code is: {status_code}')
+        if error:
+            print(f'Error occurred in PUT --> {error}')
+        else:
+            print('Network Object Group successfully updated...')
+
+        # Mark Object Store stale, now missing new objects and group changes
+        if client.store: client.store.invalidate(API_UUID,['Network','Host','NetworkGroup'])
 
         # Print report
-        print(f'Objects added to group:\n{json.dumps(diffMissing,indent=4)}')
-        print(f'Objects removed from group:\n{json.dumps(diffExtra,indent=4)}')
+        print(f'Objects added to group:\n{json.dumps(diff["missing"],indent=4)}')
+        print(f'Objects removed from group:\n{json.dumps(diff["extra"]+diff["unsupported"],indent=4)}')
+
+
+
+
+#
+#
+#
+# Define Batch Object Group Sync Script as Function
+def obj_group_sync(client):
+    print ('''
+***********************************************************************************************
+*                Sync Object Groups from directory or manifest of txt files                   *
+*_____________________________________________________________________________________________*
+*                                                                                             *
+* USER INPUT NEEDED:                                                                          *
+*                                                                                             *
+*  1. Directory of txt files, or manifest CSV file                                            *
+*                                                                                             *
+*       Notes:                                                                                *
+*          Directory: each file named after its group, ie. Group-1.txt                        *
+*          Manifest: lines of "group name,file path", paths relative to manifest              *
+*          Text files must contain only host IPs and networks with CIDR notation              *
+*                                                                                             *
+***********************************************************************************************
+''')
+
+    # Pull domains from shared Access Token
+    domains = client.domains()
+
+    if len(domains) > 1:
+        API_UUID = select('Domain',domains)['uuid']
+    else:
+        API_UUID = domains[0]['uuid']
+
+    Test = False
+    while not Test:
+        # Request Input Directory or Manifest
+        read_path = input('Please Enter Input Directory or Manifest /full/file/path: ').strip()
+        if os.path.exists(read_path):
+            groupFiles = load_group_manifest(read_path)
+            Test = True
+        else:
+            print('MUST PROVIDE INPUT DIRECTORY OR FILE...')
+
+    # Sync local Object Store if configured
+    if client.store:
+        client.store.sync(client,API_UUID,['Network','Host','NetworkGroup'])
+
+    # Index all Host and Network objects, and Network Groups once for all groups
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/networks?expanded=true&offset=0&limit=1000'
+    networks = get_collection(client,API_UUID,'Network',url)
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/hosts?expanded=true&offset=0&limit=1000'
+    hosts = get_collection(client,API_UUID,'Host',url)
+    objIndex,values = index_network_objects(itertools.chain(networks,hosts))
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/object/networkgroups?expanded=true&offset=0&limit=1000'
+    objGroups = {g['name']:g for g in get_collection(client,API_UUID,'NetworkGroup',url) if g['name'] in groupFiles}
+
+    # Compute all diffs
+    diffs = {}
+    for objGroupName,read_file in groupFiles.items():
+        if objGroupName not in objGroups:
+            print(f'Group name "{objGroupName}" not found')
+            continue
+        if not os.path.isfile(read_file):
+            print(f'Input file for group "{objGroupName}" not found --> {read_file}')
+            continue
+        with open(read_file,'r') as infile:
+            diffs[objGroupName] = diff_network_group(objGroups[objGroupName],infile,objIndex,values)
+        for ip in diffs[objGroupName]['invalid']:
+            print(f'Invalid entry in file for group "{objGroupName}", skipped --> {ip}')
+
+    # Post missing objects of all groups in one de-duplicated pass
+    create = list(dict.fromkeys(ip for diff in diffs.values() for ip in diff['create']))
+    created = create_network_objects(client,API_UUID,create)
+    if create != []:
+        client.object_index(API_UUID).invalidate()
+
+    # Update changed Object Groups, and PUT concurrently
+    #   Groups with objects which failed to be created are not updated, and reported as failed
+    putGroups = []
+    notCreated = {}
+    for objGroupName,diff in diffs.items():
+        if (diff['missing'] == []) and (diff['extra'] == []) and (diff['unsupported'] == []):
+            continue
+        missing = [ip for ip in diff['create'] if ip not in created]
+        if missing:
+            notCreated[objGroupName] = missing
+            continue
+        objGroup = objGroups[objGroupName]
+        objGroup['objects'] = diff['objects'] + [created[ip] for ip in diff['create']]
+        objGroup['literals'] = diff['literals']
+        putGroups.append(objGroup)
+    print(f'*\n*\nUPDATING {len(putGroups)} NETWORK OBJECT GROUPS...')
+    results = put_network_groups(client,API_UUID,putGroups)
+
+    # Mark Object Store stale, now missing new objects and group changes
+    if client.store: client.store.invalidate(API_UUID,['Network','Host','NetworkGroup'])
+
+    # Print report
+    print(f'*\n*\nObjects created: {len(created)}/{len(create)}')
+    print('GROUP,ADDED,REMOVED,STATUS')
+    for objGroupName,diff in diffs.items():
+        if objGroupName in notCreated:
+            print(f'{objGroupName},0,0,failed')
+            continue
+        status_code,error = results.get(objGroupName,('unchanged',None))
+        print(f'{objGroupName},{len(diff["missing"])},{len(diff["extra"])+len(diff["unsupported"])},{status_code}')
+    for objGroupName,missing in notCreated.items():
+        print(f'Group "{objGroupName}" not updated, objects not created --> {", ".join(missing)}')
 
 
 
@@ -1360,7 +1036,7 @@ def obj_group_update(server,headers,username,password):
 #
 #
 # Export ACP and Prefilter Rules
-def export_acp_rules(server,headers,username,password):
+def export_acp_rules(client):
     print ('''
 ***********************************************************************************************
 *                      Export ACP and Prefilter Rules to CSV file                             *
@@ -1369,16 +1045,10 @@ def export_acp_rules(server,headers,username,password):
 ***********************************************************************************************
 ''')
 
-    outfile = open(f'acp_rule_export_{datetime.now().strftime("%Y-%m-%d_%H%M")}.csv','w')
-    outfile.write('FMC_NAME,ACP_NAME,ACP_TYPE,ACP_ID,R_NAME,R_ID,R_ACTION,R_SRC_ZN,R_DST_ZN,R_SRC_IP,R_DST_IP,R_VLAN,R_USERS,R_APP,R_URL,R_SRC_P,R_DST_P,R_SRC_SGT,R_DST_SGT,R_IPS,R_FILE\n')
-
-    FMC_NAME = server.replace('https://','')
+    FMC_NAME = client.server.replace('https://','')
 
-    print('Generating Access Token')
-    # Generate Access Token and pull domains from auth headers
-    results=access_token(server,headers,username,password)
-    headers['X-auth-access-token']=results[0]
-    domains = results[1]
+    # Pull domains from shared Access Token
+    domains = client.domains()
 
     if len(domains) > 1:
         API_UUID = select('Domain',domains)['uuid']
@@ -1387,26 +1057,44 @@ def export_acp_rules(server,headers,username,password):
 
     # Get all Access Control Policies
     print('*\n*\nCOLLECTING Access Policies...')
-    url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies?expanded=true&offset=0&limit=1000'
-    acp_list = get_items(url,headers)
-
-    for acp in acp_list:
-        url = f'{acp["rules"]["links"]["self"]}?expanded=true&offset=0&limit=1000'
-        rules = get_items(url,headers)
-        for rule in rules:
-            temp_list = parse_rule(FMC_NAME,rule)
-            outfile.write(f'{",".join(temp_list)}\n')
-
-        # GET PREFILTER RULES ALSO
-        # Get Prefilter Policy
-        print('*\n*\nCOLLECTING Applied Prefilter Policy...')
-        url = f'{server}/api/fmc_config/v1/domain/{API_UUID}/policy/prefilterpolicies/{acp["prefilterPolicySetting"]["id"]}/prefilterrules?expanded=true&offset=0&limit=1000'
-        prefilter_rules = get_items(url,headers)
-        for rule in prefilter_rules:
-            temp_list = parse_rule(FMC_NAME,rule)
-            outfile.write(f'{",".join(temp_list)}\n')
-
-    outfile.close()
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/accesspolicies?expanded=true&offset=0&limit=1000'
+    acp_list = get_items(url,client)
+
+    # Get Prefilter Policy timestamps, for incremental export
+    print('*\n*\nCOLLECTING Prefilter Policies...')
+    url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/prefilterpolicies?expanded=true&offset=0&limit=1000'
+    prefilter_stamps = {item['id']:item.get('metadata',{}).get('timestamp') for item in get_items(url,client)}
+
+    export = RuleExport(FMC_NAME,API_UUID,acp_list,prefilter_stamps)
+    export.ask()
+
+    with RuleParser(FMC_NAME,export.processes) as parser:
+        # Collect rules of each Prefilter Policy once per run, pages are parsed while next pages are collected
+        #   Returns None for Prefilter Policy unchanged since last export
+        def prefilter_rules(prefilter_id):
+            if export.skip_prefilter(prefilter_id):
+                return None
+            print(f'*\n*\nCOLLECTING Prefilter Policy rules... {prefilter_id}')
+            url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/policy/prefilterpolicies/{prefilter_id}/prefilterrules?expanded=true&offset=0&limit=1000'
+            return submit_rule_pages(url,client,parser)
+        prefilter_memo = Memo(prefilter_rules)
+
+        # Collect rules of each policy and its Prefilter Policy, return futures of parsed pages
+        #   Rules of policy unchanged since last export are not collected
+        def policy_rules(acp):
+            pages = None
+            if not export.skip_policy(acp):
+                url = f'{acp["rules"]["links"]["self"]}?expanded=true&offset=0&limit=1000'
+                pages = submit_rule_pages(url,client,parser)
+            # GET PREFILTER RULES ALSO
+            prefilter_id = acp["prefilterPolicySetting"]["id"]
+            return pages,prefilter_id,prefilter_memo(prefilter_id)
+
+        # Collect policies concurrently, and write parsed pages in policy and page order
+        print(f'*\n*\nCOLLECTING RULES OF {len(acp_list)} POLICIES WITH {MAX_PARALLEL} WORKERS, PARSING WITH {export.processes} PROCESSES...')
+        export.write(iter_ordered(policy_rules,acp_list))
+
+    export.close()
 
 
 
@@ -1460,11 +1148,20 @@ if __name__ == "__main__":
 
     # Adding HTTPS to Server for URL
     server = f'https://{server}'
-    headers = {'Content-Type': 'application/json','Accept': 'application/json'}
 
     # Request Username and Password without showing password in clear text
     username = input('Please Enter API Username: ').strip()
     password = define_password()
+
+    # Create FMC Client, shared by every tool for connection reuse
+    client = FmcClient(server,username,password)
+
+    # Ask if local Object Store should be used for reference data
+    save = input('Would You Like To Use Local Object Store? [y/N]: ').lower()
+    if save in (['yes','ye','y']):
+        filename = f'fmc_objects_{server.replace("https://","")}.db'
+        print(f'*\n*\nUSING OBJECT STORE... {filename}\n')
+        client.store = ObjectStore(filename)
     print ('''
 ***********************************************************************************************
 *                                                                                             *
@@ -1488,6 +1185,14 @@ if __name__ == "__main__":
 *                                                                                             *
 *  9. Export ACP and Prefilter Rules to CSV file                                              *
 *                                                                                             *
+* 10. Export ACP and Prefilter Rules to CSV file (asyncio)                                    *
+*                                                                                             *
+* 11. Get Inventory List from FMC (asyncio)                                                   *
+*                                                                                             *
+* 12. Update IPS and/or File Policy for Access Rules (asyncio)                                *
+*                                                                                             *
+* 13. Sync Object Groups from directory or manifest of txt files                              *
+*                                                                                             *
 ***********************************************************************************************
 ''')
 
@@ -1499,35 +1204,51 @@ if __name__ == "__main__":
         Script = False
         while not Script:
             script = input('Please Select Tool: ')
-            if script == '1':
-                Script = True
-                blank_get(server,headers,username,password)
-            elif script == '2':
-                Script = True
-                post_network_object(server,headers,username,password)
-            elif script == '3':
-                Script = True
-                post_network_object_group(server,headers,username,password)
-            elif script == '4':
-                Script = True
-                put_intrusion_file(server,headers,username,password)
-            elif script == '5':
-                Script = True
-                get_inventory(server,headers,username,password)
-            elif script == '6':
-                Script = True
-                register_ftd(server,headers,username,password)
-            elif script == '7':
-                Script = True
-                prefilter_to_acp(server,headers,username,password)
-            elif script == '8':
-                Script = True
-                obj_group_update(server,headers,username,password)
-            elif script == '9':
-                Script = True
-                export_acp_rules(server,headers,username,password)
-            else:
-                print('INVALID ENTRY... ')
+            try:
+                if script == '1':
+                    Script = True
+                    blank_get(client)
+                elif script == '2':
+                    Script = True
+                    post_network_object(client)
+                elif script == '3':
+                    Script = True
+                    post_network_object_group(client)
+                elif script == '4':
+                    Script = True
+                    put_intrusion_file(client)
+                elif script == '5':
+                    Script = True
+                    get_inventory(client)
+                elif script == '6':
+                    Script = True
+                    register_ftd(client)
+                elif script == '7':
+                    Script = True
+                    prefilter_to_acp(client)
+                elif script == '8':
+                    Script = True
+                    obj_group_update(client)
+                elif script == '9':
+                    Script = True
+                    export_acp_rules(client)
+                elif script == '10':
+                    Script = True
+                    asyncio.run(fmc_api_async.export_acp_rules(client))
+                elif script == '11':
+                    Script = True
+                    asyncio.run(fmc_api_async.get_inventory(client))
+                elif script == '12':
+                    Script = True
+                    asyncio.run(fmc_api_async.put_intrusion_file(client))
+                elif script == '13':
+                    Script = True
+                    obj_group_sync(client)
+                else:
+                    print('INVALID ENTRY... ')
+            except PageError as err:
+                # Collection could not be collected completely, tool stops before acting on partial data
+                print(f'*\n*\nTOOL ABORTED... {err}\n')
 
         # Ask to end the loop
         print ('''
@@ -1553,8 +1274,20 @@ if __name__ == "__main__":
 *                                                                                             *
 *  9. Export ACP and Prefilter Rules to CSV file                                              *
 *                                                                                             *
+* 10. Export ACP and Prefilter Rules to CSV file (asyncio)                                    *
+*                                                                                             *
+* 11. Get Inventory List from FMC (asyncio)                                                   *
+*                                                                                             *
+* 12. Update IPS and/or File Policy for Access Rules (asyncio)                                *
+*                                                                                             *
+* 13. Sync Object Groups from directory or manifest of txt files                              *
+*                                                                                             *
 ***********************************************************************************************
 ''')
+        print(f'*\n*\n{client.limiter.report()}')
         Loop = input('*\n*\nWould You Like To use another tool? [y/N]').lower()
-        if Loop not in (['yes','ye','y','1','2','3','4','5','6','7','8','9']):
+        if Loop not in (['yes','ye','y','1','2','3','4','5','6','7','8','9','10','11','12','13']):
             break
+
+    if client.store: client.store.close()
+    client.close()
@@ -0,0 +1,276 @@
+# Import Required Modules
+import sys
+
+
+# ASA port names, as shown in "show run", and their port number
+ASA_PORTS = {
+    'aol': '5190',
+    'bgp': '179',
+    'chargen': '19',
+    'citrix-ica': '1494',
+    'cmd': '514',
+    'ctiqbe': '2748',
+    'daytime': '13',
+    'discard': '9',
+    'domain': '53',
+    'echo': '7',
+    'exec': '512',
+    'finger': '79',
+    'ftp': '21',
+    'ftp-data': '20',
+    'gopher': '70',
+    'h323': '1720',
+    'hostname': '101',
+    'http': '80',
+    'https': '443',
+    'ident': '113',
+    'imap4': '143',
+    'irc': '194',
+    'isakmp': '500',
+    'kerberos': '750',
+    'klogin': '543',
+    'kshell': '544',
+    'ldap': '389',
+    'ldaps': '636',
+    'login': '513',
+    'lotusnotes': '1352',
+    'lpd': '515',
+    'netbios-dgm': '138',
+    'netbios-ns': '137',
+    'netbios-ssn': '139',
+    'nfs': '2049',
+    'nntp': '119',
+    'ntp': '123',
+    'pcanywhere-data': '5631',
+    'pim-auto-rp': '496',
+    'pop2': '109',
+    'pop3': '110',
+    'pptp': '1723',
+    'radius': '1645',
+    'radius-acct': '1646',
+    'rsh': '514',
+    'rtsp': '554',
+    'sip': '5060',
+    'smtp': '25',
+    'snmp': '161',
+    'snmptrap': '162',
+    'sqlnet': '1521',
+    'ssh': '22',
+    'sunrpc': '111',
+    'syslog': '514',
+    'tacacs': '49',
+    'talk': '517',
+    'telnet': '23',
+    'tftp': '69',
+    'uucp': '540',
+    'who': '513',
+    'whois': '43',
+    'www': '80',
+    'xdmcp': '177'
+}
+
+# ASA ICMP type names, and their type number
+ASA_ICMP_TYPES = {
+    'echo-reply': '0',
+    'unreachable': '3',
+    'source-quench': '4',
+    'redirect': '5',
+    'alternate-address': '6',
+    'echo': '8',
+    'router-advertisement': '9',
+    'router-solicitation': '10',
+    'time-exceeded': '11',
+    'parameter-problem': '12',
+    'timestamp-request': '13',
+    'timestamp-reply': '14',
+    'information-request': '15',
+    'information-reply': '16',
+    'mask-request': '17',
+    'mask-reply': '18',
+    'traceroute': '30',
+    'conversion-error': '31',
+    'mobile-redirect': '32'
+}
+
+# ASA object-group kinds, and the FMC type of their records
+#   FMC has one PortObjectGroup type for both forms of "object-group service NAME",
+#   with a protocol (tcp, udp, tcp-udp) the group record keeps it, without its entries name their own protocols
+ASA_GROUP_TYPES = {
+    'network': 'NetworkGroup',
+    'service': 'PortObjectGroup'
+}
+
+
+#
+#
+#
+# Convert ASA port operator and arguments to FMC port value
+#   eq www --> 80, range 1000 2000 --> 1000-2000, gt 1023 --> 1024-65535
+def asa_port(fields):
+    if not fields:
+        return None
+    op,args = fields[0],[ASA_PORTS.get(i,i) for i in fields[1:]]
+    if op == 'eq' and args:
+        return args[0]
+    if op == 'range' and len(args) > 1:
+        return f'{args[0]}-{args[1]}'
+    if op == 'gt' and args and args[0].isdigit():
+        return f'{int(args[0])+1}-65535'
+    if op == 'lt' and args and args[0].isdigit():
+        return f'1-{int(args[0])-1}'
+    return None
+
+#
+#
+#
+# Build record for ASA "object network" block from its address line
+#   Returns None for blocks without address, such as object NAT sections of "show run"
+def network_object(name,fields,description):
+    if not fields:
+        return None
+    kind = fields[0]
+    if kind == 'host' and len(fields) > 1:
+        objType,value = 'Host',fields[1]
+    elif kind == 'subnet' and len(fields) > 2:
+        objType,value = 'Network',f'{fields[1]}/{fields[2]}'
+    elif kind == 'subnet' and len(fields) > 1:
+        # IPv6 prefix
+        objType,value = 'Network',fields[1]
+    elif kind == 'range' and len(fields) > 2:
+        objType,value = 'Range',f'{fields[1]}-{fields[2]}'
+    elif kind == 'fqdn' and len(fields) > 1:
+        objType,value = 'FQDN',fields[-1]
+    else:
+        return None
+    return {
+        'name': name,
+        'type': objType,
+        'description': description,
+        'value': value
+    }
+
+#
+#
+#
+# Build record for ASA "object service" block from its service line
+#   tcp/udp objects use destination port, icmp objects use icmp type
+def service_object(name,fields,description):
+    if len(fields) < 2 or fields[0] != 'service':
+        return None
+    protocol = fields[1]
+    if protocol in ('tcp','udp'):
+        Obj = {
+            'name': name,
+            'type': 'ProtocolPortObject',
+            'description': description,
+            'protocol': protocol.upper()
+        }
+        if 'destination' in fields:
+            port = asa_port(fields[fields.index('destination')+1:])
+            if port:
+                Obj['port'] = port
+        return Obj
+    if protocol in ('icmp','icmp6'):
+        Obj = {
+            'name': name,
+            'type': 'ICMPV4Object' if protocol == 'icmp' else 'ICMPV6Object',
+            'description': description
+        }
+        if len(fields) > 2:
+            Obj['icmpType'] = ASA_ICMP_TYPES.get(fields[2],fields[2])
+        return Obj
+    return None
+
+#
+#
+#
+# Stream typed records from ASA configuration lines
+#   lines may be an open file, only the current object or object-group block is held in memory
+#   Object records are FMC object payloads: Host, Network, Range, FQDN, ProtocolPortObject, ICMPV4Object, ICMPV6Object
+#   Group records carry FMC type, name, description, protocol (port groups only) and list of entry lines
+#   All other configuration is skipped
+def iter_asa_records(lines):
+    block = None
+    for line in lines:
+        if not line.startswith(' '):
+            if block:
+                record = finish_block(block)
+                if record:
+                    yield record
+            block = start_block(line.split())
+        elif block:
+            line = line.strip()
+            if line.startswith('description '):
+                block['description'] = line[12:]
+            elif line:
+                block['lines'].append(line)
+    if block:
+        record = finish_block(block)
+        if record:
+            yield record
+
+def start_block(fields):
+    if len(fields) < 3:
+        return None
+    if fields[0] == 'object' and fields[1] in ('network','service'):
+        return {'kind':fields[1],'name':fields[2],'description':'','lines':[]}
+    if fields[0] == 'object-group' and fields[1] in ASA_GROUP_TYPES:
+        return {
+            'kind': f'group-{fields[1]}',
+            'name': fields[2],
+            'protocol': fields[3] if len(fields) > 3 else None,
+            'description': '',
+            'lines': []
+        }
+    return None
+
+def finish_block(block):
+    if block['kind'] == 'network':
+        return network_object(block['name'],block['lines'][0].split() if block['lines'] else [],block['description'])
+    if block['kind'] == 'service':
+        return service_object(block['name'],block['lines'][0].split() if block['lines'] else [],block['description'])
+    Obj = {
+        'name': block['name'],
+        'type': ASA_GROUP_TYPES[block['kind'][6:]],
+        'description': block['description'],
+        'entries': block['lines']
+    }
+    if block.get('protocol'):
+        Obj['protocol'] = block['protocol']
+    return Obj
+
+#
+#
+#
+# Collect network objects and network group entries from ASA configuration lines
+#   Returns (Data, groupEntries), Data['objects'] == dict of object type to list of objects
+#   groupEntries == dict of group name to list of entry lines
+def load_network_objects(lines):
+    Data = {
+        'objects': {
+            'Host':[],
+            'Network':[],
+            'Range':[],
+            'FQDN':[]
+        }
+    }
+    groupEntries = {}
+    for record in iter_asa_records(lines):
+        if record['type'] in Data['objects']:
+            Data['objects'][record['type']].append(record)
+        elif record['type'] == 'NetworkGroup':
+            groupEntries[record['name']] = record['entries']
+    return Data,groupEntries
+
+
+#
+#
+#
+# Print record count by type for ASA configuration file if main
+if __name__ == "__main__":
+    counts = {}
+    with open(sys.argv[1]) as infile:
+        for record in iter_asa_records(infile):
+            counts[record['type']] = counts.get(record['type'],0)+1
+    for objType,count in sorted(counts.items()):
+        print(f'{objType}: {count}')
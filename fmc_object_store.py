@@ -0,0 +1,233 @@
+# Import Required Modules
+import json
+import time
+import sqlite3
+import requests
+import threading
+import traceback
+from email.utils import parsedate_to_datetime
+
+# Import custom modules from file
+from fmc_api_module import \
+        iter_items,\
+        canonical_address
+
+
+# Collections mirrored in local Object Store, and their API path
+STORE_COLLECTIONS = {
+    'Host': 'object/hosts',
+    'Network': 'object/networks',
+    'Range': 'object/ranges',
+    'FQDN': 'object/fqdns',
+    'NetworkGroup': 'object/networkgroups',
+    'AccessPolicy': 'policy/accesspolicies',
+    'IntrusionPolicy': 'policy/intrusionpolicies',
+    'VariableSet': 'object/variablesets',
+    'FilePolicy': 'policy/filepolicies'
+}
+
+# Collection families, and audit log subsystem and message keywords of changes to them, matched case insensitive
+#   Audit messages are free text, so a record matching a family pulls every collection of that family
+STORE_AUDIT_FAMILIES = {
+    'object': (['Host','Network','Range','FQDN','NetworkGroup','VariableSet'],['object','host','network','range','fqdn','variable set']),
+    'policy': (['AccessPolicy','IntrusionPolicy','FilePolicy'],['policy','rule'])
+}
+# Audit log keywords of records which change no collection, matched case insensitive
+#   Records matching no family and no keyword here pull every collection
+STORE_AUDIT_IGNORE = ['login','logout','log in','log out','session','deploy','backup','report','health']
+
+# Object Store schema, stores of older schema version are dropped and pulled again on next sync
+#   address == canonical form of IP address value, for lookups matching 10.0.0.0/255.0.0.0 to 10.0.0.0/8
+SCHEMA_VERSION = 1
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS objects (
+    domain TEXT NOT NULL,
+    type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT,
+    value TEXT,
+    address TEXT,
+    timestamp INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (domain, id)
+);
+CREATE INDEX IF NOT EXISTS objects_name ON objects (domain, type, name);
+CREATE INDEX IF NOT EXISTS objects_value ON objects (domain, type, value);
+CREATE INDEX IF NOT EXISTS objects_address ON objects (domain, type, address);
+CREATE TABLE IF NOT EXISTS sync (
+    domain TEXT NOT NULL,
+    type TEXT NOT NULL,
+    synced REAL NOT NULL,
+    PRIMARY KEY (domain, type)
+);
+'''
+
+
+#
+#
+#
+# Local SQLite Object Store, mirrors FMC collections with incremental sync
+class ObjectStore:
+    def __init__(self,path):
+        self.path = path
+        self.conn = sqlite3.connect(path,check_same_thread=False)
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.conn.executescript('DROP TABLE IF EXISTS objects; DROP TABLE IF EXISTS sync;')
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    # Return epoch time of last sync for collection, None if never synced
+    def last_sync(self,API_UUID,objType):
+        with self.lock:
+            row = self.conn.execute('SELECT synced FROM sync WHERE domain=? AND type=?',(API_UUID,objType)).fetchone()
+        return row[0] if row else None
+
+    # Sync collections from FMC
+    #   First sync pulls full collection, later syncs pull only collections named by audit records
+    #   since their last sync, and write only objects with changed metadata timestamp or content
+    #   Sync times are FMC server time, taken from response Date header, so host clock skew is irrelevant
+    def sync(self,client,API_UUID,objTypes=None):
+        if not objTypes:
+            objTypes = list(STORE_COLLECTIONS)
+        synced = {objType:self.last_sync(API_UUID,objType) for objType in objTypes}
+        last = [i for i in synced.values() if i is not None]
+        server_time,changed = audit_changes(client,API_UUID,min(last) if last else None)
+        pending = [objType for objType in objTypes if (synced[objType] is None) or (changed is None) or (objType in changed)]
+        if not pending:
+            print('*\n*\nOBJECT STORE UP TO DATE...')
+            return
+        for objType in pending:
+            self.sync_collection(client,API_UUID,objType,server_time)
+
+    # Pull collection, write changed objects, and delete objects removed from FMC
+    #   synced == FMC server time taken before pull, changes made during pull are pulled again next sync
+    def sync_collection(self,client,API_UUID,objType,synced):
+        print(f'*\n*\nSYNCING {objType} Objects to Object Store...')
+        with self.lock:
+            stored = {row[0]:row[1:] for row in self.conn.execute('SELECT id, timestamp, data FROM objects WHERE domain=? AND type=?',(API_UUID,objType))}
+        url = f'{client.server}/api/fmc_config/v1/domain/{API_UUID}/{STORE_COLLECTIONS[objType]}?expanded=true&offset=0&limit=1000'
+        rows = []
+        seen = set()
+        for item in iter_items(url,client,prefetch=True):
+            seen.add(item['id'])
+            timestamp = item.get('metadata',{}).get('timestamp')
+            previous = stored.get(item['id'])
+            # Unchanged FMC metadata timestamp, object not modified since stored
+            if previous and (timestamp is not None) and (previous[0] == timestamp):
+                continue
+            data = json.dumps(item,sort_keys=True)
+            if (not previous) or (previous[1] != data):
+                rows.append((
+                    API_UUID,
+                    objType,
+                    item['id'],
+                    item.get('name'),
+                    item.get('value'),
+                    canonical_address(item['value']) if item.get('value') else None,
+                    timestamp,
+                    data
+                ))
+        removed = [(API_UUID,i) for i in stored if i not in seen]
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO objects VALUES (?,?,?,?,?,?,?,?)',rows)
+            self.conn.executemany('DELETE FROM objects WHERE domain=? AND id=?',removed)
+            self.conn.execute('INSERT OR REPLACE INTO sync VALUES (?,?,?)',(API_UUID,objType,synced))
+        print(f'{objType}: {len(rows)} changed, {len(removed)} removed, {len(seen)} total')
+
+    # Mark collections stale after tools change them, forcing pull on next sync
+    def invalidate(self,API_UUID,objTypes):
+        with self.lock, self.conn:
+            self.conn.executemany('DELETE FROM sync WHERE domain=? AND type=?',[(API_UUID,i) for i in objTypes])
+
+    # Return all objects of type
+    def items(self,API_UUID,objType):
+        with self.lock:
+            rows = self.conn.execute('SELECT data FROM objects WHERE domain=? AND type=? ORDER BY name',(API_UUID,objType)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    # Return object of type with name, None if not found
+    def find(self,API_UUID,objType,name):
+        with self.lock:
+            row = self.conn.execute('SELECT data FROM objects WHERE domain=? AND type=? AND name=?',(API_UUID,objType,name)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Return objects of type with value, IP addresses compared in canonical form
+    def find_by_value(self,API_UUID,objType,value):
+        canonical = canonical_address(value)
+        with self.lock:
+            if canonical:
+                rows = self.conn.execute('SELECT data FROM objects WHERE domain=? AND type=? AND address=?',(API_UUID,objType,canonical)).fetchall()
+            else:
+                rows = self.conn.execute('SELECT data FROM objects WHERE domain=? AND type=? AND value=?',(API_UUID,objType,value)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    # Return object with UUID, None if not found
+    def get(self,API_UUID,ID):
+        with self.lock:
+            row = self.conn.execute('SELECT data FROM objects WHERE domain=? AND id=?',(API_UUID,ID)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        self.conn.close()
+
+
+#
+#
+#
+# Return FMC server time of response, from its Date header
+#   Falls back to local time when header is missing
+def server_time(r):
+    try:
+        return parsedate_to_datetime(r.headers['Date']).timestamp()
+    except (KeyError,TypeError,ValueError):
+        return time.time()
+
+#
+#
+#
+# Check FMC audit log for changes since FMC server time, return (server time, set of changed collection types)
+#   Changed types are every type of STORE_AUDIT_FAMILIES matched by audit record subsystem and message
+#   Changed types are None when audit log cannot be read, since is None, or a record matches no family
+#   and is not known to be unrelated, forcing a pull of every collection
+def audit_changes(client,API_UUID,since):
+    url = f'{client.server}/api/fmc_platform/v1/domain/{API_UUID}/audit/auditrecords?offset=0&limit=1'
+    if since is not None:
+        url = f'{client.server}/api/fmc_platform/v1/domain/{API_UUID}/audit/auditrecords?filter=startTime:{int(since)}&expanded=true&offset=0&limit=1000'
+    now = time.time()
+    try:
+        r = client.get(url)
+        now = server_time(r)
+        if r.status_code != 200:
+            print(f'Audit log unavailable, status code:--> {r.status_code}')
+            return now,None
+        if since is None:
+            return now,None
+        json_resp = r.json()
+        records = json_resp.get('items',[])
+        if 'next' in json_resp.get('paging',{}):
+            records += list(iter_items(json_resp['paging']['next'][0],client))
+    except (requests.exceptions.RequestException,ValueError) as err:
+        print (f'Error in connection --> {traceback.format_exc()}')
+        return now,None
+    changed = set()
+    for record in records:
+        text = f'{record.get("subsystem","")} {record.get("message","")}'.lower()
+        families = [objTypes for objTypes,keywords in STORE_AUDIT_FAMILIES.values() if any(i in text for i in keywords)]
+        if families:
+            for objTypes in families:
+                changed.update(objTypes)
+        elif not any(i in text for i in STORE_AUDIT_IGNORE):
+            print(f'Unrecognised audit record, pulling every collection --> {text}')
+            return now,None
+    return now,changed
+
+
+#
+#
+#
+# Collect items of type from Object Store when configured, otherwise stream from FMC
+def get_collection(client,API_UUID,objType,url):
+    if client.store:
+        return client.store.items(API_UUID,objType)
+    return iter_items(url,client,prefetch=True)